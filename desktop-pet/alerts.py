@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+告警规则模块
+对系统采样数据增量计算滑动窗口内的平均值、最小值和最大值：
+平均值用累加和，最小/最大值用单调队列，每个新样本对每条规则的开销都是常数，与窗口长度无关；
+相同指标和窗口长度的规则共用一个窗口
+
+规则文件 alert_rules.json 示例：
+    [
+        {"name": "CPU 持续过高", "metric": "cpu", "agg": "avg", "op": ">",
+         "threshold": 90, "window": 30}
+    ]
+指标：cpu、mem（百分比），rx、tx（字节/秒，阈值可写作 "50MB" 等）
+"""
+
+import json
+from collections import deque
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# 默认规则文件
+RULES_FILE = "alert_rules.json"
+
+METRICS = ("cpu", "mem", "rx", "tx")
+AGGREGATES = ("avg", "min", "max")
+OPERATORS = {
+    ">": lambda value, threshold: value > threshold,
+    ">=": lambda value, threshold: value >= threshold,
+    "<": lambda value, threshold: value < threshold,
+    "<=": lambda value, threshold: value <= threshold,
+}
+
+# 阈值单位
+UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+# 相邻样本间隔超过该秒数（例如挂起后恢复）时清空窗口
+MAX_SAMPLE_GAP = 5
+
+
+def parse_threshold(value):
+    """解析数字或带单位的阈值，如 "50MB" """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().upper().replace("/S", "")
+    for unit, factor in UNITS.items():
+        if text.endswith(unit):
+            return float(text[:-len(unit)]) * factor
+    return float(text)
+
+
+class RollingWindow:
+    """按时间滑动的窗口，维护累加和与单调队列"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.samples = deque()   # (时间, 值)
+        self.total = 0.0
+        self.min_queue = deque()  # 值单调递增的 (时间, 值)，队首为最小值
+        self.max_queue = deque()  # 值单调递减的 (时间, 值)，队首为最大值
+        self.started = None      # 连续采样开始的时间
+        self.last_time = None
+
+    def clear(self):
+        """清空窗口"""
+        self.samples.clear()
+        self.min_queue.clear()
+        self.max_queue.clear()
+        self.total = 0.0
+        self.started = None
+
+    def push(self, now, value):
+        """加入新样本并移出过期样本"""
+        if self.last_time is not None and now - self.last_time > MAX_SAMPLE_GAP:
+            self.clear()
+        if self.started is None:
+            self.started = now
+        self.last_time = now
+
+        self.samples.append((now, value))
+        self.total += value
+
+        while self.min_queue and self.min_queue[-1][1] >= value:
+            self.min_queue.pop()
+        self.min_queue.append((now, value))
+        while self.max_queue and self.max_queue[-1][1] <= value:
+            self.max_queue.pop()
+        self.max_queue.append((now, value))
+
+        # 只保留最近 seconds 秒内的样本
+        cutoff = now - self.seconds
+        while self.samples[0][0] <= cutoff:
+            self.total -= self.samples.popleft()[1]
+        while self.min_queue[0][0] <= cutoff:
+            self.min_queue.popleft()
+        while self.max_queue[0][0] <= cutoff:
+            self.max_queue.popleft()
+
+    def full(self):
+        """是否已连续采样满一个窗口"""
+        return self.started is not None and self.last_time - self.started >= self.seconds
+
+    def value(self, aggregate):
+        """窗口内的聚合值"""
+        if aggregate == "avg":
+            return self.total / len(self.samples)
+        if aggregate == "min":
+            return self.min_queue[0][1]
+        return self.max_queue[0][1]
+
+
+class AlertRule:
+    """一条告警规则"""
+
+    def __init__(self, config):
+        self.name = str(config["name"])
+        self.metric = config["metric"]
+        self.aggregate = config.get("agg", "avg")
+        self.op = config.get("op", ">")
+        self.threshold = parse_threshold(config["threshold"])
+        self.window = float(config.get("window", 10))
+        self.message = str(config.get("message", self.name))
+
+        if self.metric not in METRICS:
+            raise ValueError(f"未知指标 {self.metric}")
+        if self.aggregate not in AGGREGATES:
+            raise ValueError(f"未知聚合方式 {self.aggregate}")
+        if self.op not in OPERATORS:
+            raise ValueError(f"未知比较符 {self.op}")
+        if self.window <= 0:
+            raise ValueError("窗口长度必须大于0")
+
+        self.compare = OPERATORS[self.op]
+        self.firing = False
+        self.value = None  # 最近一次的聚合值
+
+
+def load_rules(path=RULES_FILE):
+    """读取规则文件，无效的规则会被跳过"""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            configs = json.load(file)
+    except FileNotFoundError:
+        return []
+    except (IOError, ValueError) as e:
+        print(f"警告: 无法读取告警规则: {e}")
+        return []
+
+    rules = []
+    for config in configs if isinstance(configs, list) else []:
+        try:
+            rules.append(AlertRule(config))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"警告: 跳过无效的告警规则 {config}: {e}")
+    return rules
+
+
+class AlertEngine(QObject):
+    """告警引擎，每收到一个样本就增量更新所有规则"""
+
+    # 规则开始告警
+    alert_fired = pyqtSignal(object)
+    # 正在告警的规则列表发生变化
+    alerts_changed = pyqtSignal(object)
+
+    def __init__(self, rules, parent=None):
+        super().__init__(parent)
+        self.rules = list(rules)
+
+        # (指标, 窗口秒数) -> 窗口，以及使用它的规则
+        self.windows = {}
+        self.bindings = []
+        for rule in self.rules:
+            key = (rule.metric, rule.window)
+            if key not in self.windows:
+                self.windows[key] = RollingWindow(rule.window)
+            self.bindings.append((rule, self.windows[key]))
+
+    def firing(self):
+        """正在告警的规则"""
+        return [rule for rule in self.rules if rule.firing]
+
+    def feed(self, sample):
+        """处理一个样本：{"time": 秒, "cpu": ..., "mem": ..., "rx": ..., "tx": ...}"""
+        now = sample["time"]
+        for (metric, _), window in self.windows.items():
+            window.push(now, sample[metric])
+
+        fired = []
+        changed = False
+        for rule, window in self.bindings:
+            rule.value = window.value(rule.aggregate)
+            firing = window.full() and rule.compare(rule.value, rule.threshold)
+            if firing != rule.firing:
+                rule.firing = firing
+                changed = True
+                if firing:
+                    fired.append(rule)
+
+        for rule in fired:
+            self.alert_fired.emit(rule)
+        if changed:
+            self.alerts_changed.emit(self.firing())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+动画状态图模块
+从配置文件读取动画状态（帧组、帧率、停留时间、移动速度）和带权重的状态转移，
+加载时编译成别名表，选择下一个状态只需常数时间；同一张图由所有宠物共享
+"""
+
+import json
+import random
+
+# 默认配置文件
+GRAPH_FILE = "animation_graph.json"
+
+# 配置文件缺失或无效时使用的状态图（与原来的待机/行走切换一致）
+DEFAULT_GRAPH = {
+    "initial": "IDLE",
+    "states": {
+        "IDLE": {"label": "待机", "frames": "IDLE", "fps": 20, "dwell": [1.5, 4.0],
+                 "next": {"IDLE": 1, "WALK": 4}},
+        "WALK": {"label": "行走", "frames": "WALK", "fps": 20, "dwell": [1.5, 4.0],
+                 "speed": 1, "turn": 0.2, "next": {"WALK": 1, "IDLE": 4}},
+    },
+}
+
+# 宠物逻辑直接使用的状态（提醒时行走、到达后待机）
+REQUIRED_STATES = ("IDLE", "WALK")
+
+
+class AnimState:
+    """编译后的动画状态"""
+
+    def __init__(self, index, name, config):
+        self.index = index
+        self.name = name
+        self.label = str(config.get("label", name))
+        self.frames = str(config.get("frames", name))  # 使用的帧组
+        self.fps = float(config.get("fps", 20))        # 播放帧率
+        self.speed = float(config.get("speed", 0))     # 移动速度倍数，0表示原地
+        self.turn = float(config.get("turn", 0))       # 进入时随机换方向的概率
+        self.hop = float(config.get("hop", 0))         # 跳跃高度（原始像素）
+
+        dwell = config.get("dwell", [1.5, 4.0])
+        self.dwell_min, self.dwell_max = float(dwell[0]), float(dwell[1])
+
+        if self.fps <= 0:
+            raise ValueError(f"状态 {name} 的帧率必须大于0")
+        if not 0 < self.dwell_min <= self.dwell_max:
+            raise ValueError(f"状态 {name} 的停留时间无效")
+
+
+def build_alias_table(weights):
+    """
+    用 Vose 别名法把权重编译成 (概率表, 别名表)
+
+    采样时随机取一列 i，以 prob[i] 的概率选 i，否则选 alias[i]
+    """
+    count = len(weights)
+    total = float(sum(weights))
+    scaled = [weight * count / total for weight in weights]
+    prob = [1.0] * count
+    alias = list(range(count))
+
+    small = [i for i, value in enumerate(scaled) if value < 1.0]
+    large = [i for i, value in enumerate(scaled) if value >= 1.0]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        prob[less] = scaled[less]
+        alias[less] = more
+        scaled[more] -= 1.0 - scaled[less]
+        (small if scaled[more] < 1.0 else large).append(more)
+
+    # 剩余的列由于浮点误差接近1，直接取自身
+    return prob, alias
+
+
+class AnimationGraph:
+    """编译后的动画状态图"""
+
+    def __init__(self, config):
+        states = config.get("states")
+        if not isinstance(states, dict) or not states:
+            raise ValueError("没有定义任何状态")
+
+        self.order = [AnimState(index, name, state) for index, (name, state) in enumerate(states.items())]
+        self.states = {state.name: state for state in self.order}
+
+        for name in REQUIRED_STATES:
+            if name not in self.states:
+                raise ValueError(f"缺少必需的状态 {name}")
+
+        self.initial = self.states.get(config.get("initial"), self.order[0])
+
+        # 每个状态的转移表：目标状态、概率表、别名表
+        self.targets = []
+        self.prob = []
+        self.alias = []
+        for state in self.order:
+            transitions = states[state.name].get("next") or {state.name: 1}
+            targets = []
+            weights = []
+            for name, weight in transitions.items():
+                if name not in self.states:
+                    raise ValueError(f"状态 {state.name} 转移到未定义的状态 {name}")
+                if weight > 0:
+                    targets.append(self.states[name])
+                    weights.append(weight)
+            if not targets:
+                raise ValueError(f"状态 {state.name} 没有有效的转移")
+
+            prob, alias = build_alias_table(weights)
+            self.targets.append(targets)
+            self.prob.append(prob)
+            self.alias.append(alias)
+
+    def next_state(self, state):
+        """按权重随机选择下一个状态"""
+        targets = self.targets[state.index]
+        column = random.randrange(len(targets))
+        if random.random() >= self.prob[state.index][column]:
+            column = self.alias[state.index][column]
+        return targets[column]
+
+    def dwell_ms(self, state):
+        """随机生成在该状态停留的毫秒数"""
+        return int(random.uniform(state.dwell_min, state.dwell_max) * 1000)
+
+
+def load_graph(path=GRAPH_FILE):
+    """读取并编译状态图，文件缺失或无效时使用默认状态图"""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return AnimationGraph(json.load(file))
+    except FileNotFoundError:
+        pass
+    except (IOError, ValueError, TypeError, KeyError, IndexError, AttributeError) as e:
+        print(f"警告: 动画配置无效，使用默认动画: {e}")
+    return AnimationGraph(DEFAULT_GRAPH)
+
+
+# 所有宠物共享的状态图
+_shared_graph = None
+
+
+def shared_graph():
+    """返回共享的状态图，首次调用时加载"""
+    global _shared_graph
+    if _shared_graph is None:
+        _shared_graph = load_graph()
+    return _shared_graph
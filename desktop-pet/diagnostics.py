@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+诊断模块
+在运行中的进程里按需采集 cProfile 性能数据、tracemalloc 内存快照和对象计数；
+未启用时不加载 cProfile/tracemalloc，也不产生任何开销
+"""
+
+import os
+import gc
+import sys
+from datetime import datetime
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QPixmap
+
+# 内存快照对比时输出的分配位置数量
+TOP_ALLOCATIONS = 10
+
+
+def timestamp_name(prefix, suffix):
+    """生成带时间的文件名"""
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}"
+
+
+class Diagnostics:
+    """诊断工具，整个进程共享一个实例"""
+
+    def __init__(self):
+        self.profiler = None        # 正在运行的 cProfile 会话
+        self.last_snapshot = None   # 上一次的内存快照
+
+    @property
+    def profiling(self):
+        """是否正在采集性能数据"""
+        return self.profiler is not None
+
+    @property
+    def tracing_memory(self):
+        """是否正在追踪内存分配"""
+        return self.last_snapshot is not None
+
+    def start_profile(self):
+        """开始采集界面线程的性能数据"""
+        if self.profiler:
+            return "性能采集已在进行中"
+
+        import cProfile
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        return "已开始性能采集"
+
+    def stop_profile(self):
+        """停止采集并写入 .pstats 文件"""
+        if not self.profiler:
+            return "没有正在进行的性能采集"
+
+        self.profiler.disable()
+        path = timestamp_name("profile", ".pstats")
+        try:
+            self.profiler.dump_stats(path)
+        except IOError:
+            return "无法写入性能数据"
+        finally:
+            self.profiler = None
+        return f"性能数据已保存：{path}"
+
+    def take_snapshot(self):
+        """拍摄内存快照，并与上一次快照对比，返回摘要"""
+        import tracemalloc
+        # 排除 tracemalloc 自身的分配，基准快照和对比快照使用相同的过滤
+        filters = (tracemalloc.Filter(False, tracemalloc.__file__),)
+
+        # 追踪可能已由 PYTHONTRACEMALLOC 开启，是否有基准快照才决定是否对比
+        if self.last_snapshot is None or not tracemalloc.is_tracing():
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.last_snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+            return "已开始内存追踪，再次拍摄快照即可对比"
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+        stats = snapshot.compare_to(self.last_snapshot, "lineno")[:TOP_ALLOCATIONS]
+        self.last_snapshot = snapshot
+
+        lines = [str(stat) for stat in stats]
+        path = timestamp_name("memory", ".txt")
+        try:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("\n".join(lines) + "\n")
+        except IOError:
+            path = None
+
+        current, peak = tracemalloc.get_traced_memory()
+        summary = [f"当前 {current / 1024:.0f} KB，峰值 {peak / 1024:.0f} KB"]
+        for stat in stats[:3]:
+            frame = stat.traceback[0]
+            summary.append(f"{os.path.basename(frame.filename)}:{frame.lineno} {stat.size_diff / 1024:+.1f} KB")
+        if path:
+            summary.append(f"详情：{path}")
+        return "\n".join(summary)
+
+    def stop_memory_trace(self):
+        """停止内存追踪"""
+        import tracemalloc
+        tracemalloc.stop()
+        self.last_snapshot = None
+        return "已停止内存追踪"
+
+    def object_counts(self):
+        """统计存活的 QPixmap、备忘录窗口和计时器数量"""
+        # 备忘录模块未加载时不可能存在备忘录窗口
+        memo = sys.modules.get("memo")
+        memo_window = memo.MemoWindow if memo else None
+
+        pixmaps = memo_windows = timers = 0
+        for obj in gc.get_objects():
+            if isinstance(obj, QPixmap):
+                pixmaps += 1
+            elif isinstance(obj, QTimer):
+                timers += 1
+            elif memo_window and isinstance(obj, memo_window):
+                memo_windows += 1
+        return {"pixmaps": pixmaps, "memo_windows": memo_windows, "timers": timers}
+
+
+# 进程内共享的诊断实例
+diagnostics = Diagnostics()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+帧耗时统计模块
+用固定分桶的直方图记录动画更新、移动和绘制的耗时，以及计时器的延迟和掉帧
+"""
+
+import json
+import time
+from array import array
+from bisect import bisect_left
+
+# 直方图分桶上界（微秒），最后一个桶收集所有更大的值
+BUCKET_BOUNDS = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000)
+
+
+class Histogram:
+    """固定分桶直方图，记录样本时不分配新对象"""
+
+    def __init__(self, bounds=BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.counts = array("q", [0] * (len(bounds) + 1))
+        self.total = 0
+        self.max_us = 0
+
+    def add(self, value_ns):
+        """记录一个以纳秒为单位的样本"""
+        value_us = value_ns // 1000
+        self.counts[bisect_left(self.bounds, value_us)] += 1
+        self.total += 1
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def percentile(self, fraction):
+        """返回分位数所在桶的上界（微秒）"""
+        if not self.total:
+            return 0
+        target = fraction * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.bounds[index] if index < len(self.bounds) else self.max_us
+        return self.max_us
+
+    def reset(self):
+        """清空数据"""
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.total = 0
+        self.max_us = 0
+
+    def to_dict(self):
+        """转换为可序列化的字典"""
+        return {
+            "bounds_us": list(self.bounds),
+            "counts": list(self.counts),
+            "total": self.total,
+            "max_us": self.max_us,
+            "p50_us": self.percentile(0.5),
+            "p99_us": self.percentile(0.99),
+        }
+
+
+class FrameStats:
+    """动画帧统计"""
+
+    def __init__(self, interval_ms):
+        # 各环节耗时
+        self.tick = Histogram()
+        self.move = Histogram()
+        self.paint = Histogram()
+        # 计时器实际间隔超出预期间隔的部分
+        self.lateness = Histogram()
+
+        self.interval_ns = interval_ms * 1000000
+        self.last_tick_ns = 0
+        self.late_frames = 0     # 延迟超过半个间隔的帧数
+        self.dropped_frames = 0  # 因延迟而整帧错过的帧数
+
+    def set_interval(self, interval_ms):
+        """动画计时器间隔变化时更新预期间隔"""
+        self.interval_ns = interval_ms * 1000000
+        self.last_tick_ns = 0
+
+    def skip_gap(self):
+        """计时器暂停后恢复时调用，不把暂停期间计为掉帧"""
+        self.last_tick_ns = 0
+
+    def tick_started(self, now_ns):
+        """动画计时器触发时调用，统计延迟和掉帧"""
+        last = self.last_tick_ns
+        self.last_tick_ns = now_ns
+        if not last:
+            return
+
+        late = now_ns - last - self.interval_ns
+        if late < 0:
+            late = 0
+        self.lateness.add(late)
+
+        if late * 2 > self.interval_ns:
+            self.late_frames += 1
+            self.dropped_frames += late // self.interval_ns
+
+    def reset(self):
+        """清空所有统计"""
+        for histogram in (self.tick, self.move, self.paint, self.lateness):
+            histogram.reset()
+        self.last_tick_ns = 0
+        self.late_frames = 0
+        self.dropped_frames = 0
+
+    def summary(self):
+        """简短的统计文字，用于叠加显示"""
+        return (f"tick p50 {self.tick.percentile(0.5)}us p99 {self.tick.percentile(0.99)}us\n"
+                f"paint p50 {self.paint.percentile(0.5)}us p99 {self.paint.percentile(0.99)}us\n"
+                f"late {self.late_frames} drop {self.dropped_frames}")
+
+    def to_dict(self):
+        """转换为可序列化的字典"""
+        return {
+            "time": time.time(),
+            "interval_ms": self.interval_ns / 1000000,
+            "late_frames": self.late_frames,
+            "dropped_frames": self.dropped_frames,
+            "tick": self.tick.to_dict(),
+            "move": self.move.to_dict(),
+            "paint": self.paint.to_dict(),
+            "lateness": self.lateness.to_dict(),
+        }
+
+    def dump(self, path):
+        """把统计写入JSON文件，便于附在问题报告中"""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
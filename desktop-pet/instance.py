@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+单实例模块
+第一个启动的进程通过 QLocalServer 接收命令，之后的启动只把命令转发给它然后退出
+"""
+
+import json
+import getpass
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+# 本地服务名，按用户区分
+SERVER_NAME = f"desktop-pet-{getpass.getuser()}"
+
+# 转发命令时的超时（毫秒）
+CONNECT_TIMEOUT = 200
+REPLY_TIMEOUT = 2000
+
+# 支持的命令及说明
+COMMANDS = {
+    "add-memo": "添加备忘录：add-memo \"内容\"",
+    "show-pet": "把已有的宠物显示到最前面",
+    "spawn-pet": "再召唤一只宠物",
+    "show-monitor": "显示系统监控",
+    "quit": "退出程序",
+}
+
+
+def send_command(command, args=(), name=SERVER_NAME):
+    """
+    把命令转发给正在运行的实例
+
+    不需要创建 QApplication；没有实例在运行时返回None，否则返回 (是否成功, 消息)
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(CONNECT_TIMEOUT):
+        return None
+
+    line = json.dumps([command] + list(args), ensure_ascii=False) + "\n"
+    socket.write(line.encode("utf-8"))
+    socket.waitForBytesWritten(CONNECT_TIMEOUT)
+
+    # 读取一行回复
+    data = b""
+    while not data.endswith(b"\n"):
+        if not socket.waitForReadyRead(REPLY_TIMEOUT):
+            break
+        data += bytes(socket.readAll())
+    socket.disconnectFromServer()
+
+    try:
+        reply = json.loads(data.decode("utf-8"))
+        return bool(reply["ok"]), str(reply.get("message", ""))
+    except (ValueError, KeyError, TypeError):
+        return False, "实例没有响应"
+
+
+class CommandServer(QObject):
+    """命令服务端，每个连接按行接收 JSON 数组形式的命令"""
+
+    def __init__(self, handler, name=SERVER_NAME, parent=None):
+        super().__init__(parent)
+        # handler(命令, 参数列表) -> (是否成功, 消息)
+        self.handler = handler
+        self.name = name
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.on_new_connection)
+
+    def listen(self):
+        """开始监听，已有实例在运行时返回False"""
+        if self.server.listen(self.name):
+            return True
+
+        # 能连上说明已有实例；否则是上次异常退出残留的套接字
+        socket = QLocalSocket()
+        socket.connectToServer(self.name)
+        if socket.waitForConnected(CONNECT_TIMEOUT):
+            socket.disconnectFromServer()
+            return False
+
+        QLocalServer.removeServer(self.name)
+        return self.server.listen(self.name)
+
+    def close(self):
+        """停止监听"""
+        self.server.close()
+
+    def on_new_connection(self):
+        """新的客户端连接"""
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.readyRead.connect(lambda s=socket: self.on_ready_read(s))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def on_ready_read(self, socket):
+        """读取并执行完整的命令行"""
+        while socket.canReadLine():
+            line = bytes(socket.readLine()).decode("utf-8", "replace")
+            try:
+                parts = json.loads(line)
+                command, args = str(parts[0]), [str(arg) for arg in parts[1:]]
+            except (ValueError, IndexError, TypeError):
+                ok, message = False, "无法解析命令"
+            else:
+                ok, message = self.handler(command, args)
+
+            reply = json.dumps({"ok": ok, "message": message}, ensure_ascii=False) + "\n"
+            socket.write(reply.encode("utf-8"))
+            socket.flush()
@@ -3,22 +3,77 @@
 
 """
 桌面像素宠物主程序
+
+用法：
+    python main.py                      启动宠物（已在运行时把已有的宠物显示到最前面）
+    python main.py add-memo "内容"      添加备忘录
+    python main.py spawn-pet            再召唤一只宠物
+    python main.py show-monitor         显示系统监控
+    python main.py quit                 退出程序
+    python main.py --startup-trace      启动时输出各阶段耗时
+
+已有实例在运行时，命令会转发给它，当前进程不创建 QApplication 直接退出
 """
 
+# 最先导入，记录启动起点
+import startup_trace
 import sys
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import Qt
-from pet import DesktopPet
+from instance import COMMANDS, send_command
 
-if __name__ == "__main__":
+
+def main(argv):
+    """程序入口"""
+    if "--startup-trace" in argv:
+        argv = [arg for arg in argv if arg != "--startup-trace"]
+        startup_trace.enable()
+    
+    command, args = None, []
+    if argv:
+        command, args = argv[0], argv[1:]
+        if command not in COMMANDS:
+            print(__doc__)
+            return 2
+    
+    # 已有实例在运行时只转发命令；不带命令的启动只唤起已有的宠物，不再新增宠物和计时器
+    reply = send_command(command or "show-pet", args)
+    if reply is not None:
+        ok, message = reply
+        print(message)
+        return 0 if ok else 1
+    startup_trace.mark("命令转发")
+    
+    if command == "quit":
+        print("没有正在运行的实例")
+        return 1
+    
+    # 只有需要真正启动时才加载界面相关模块
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import Qt
+    from pet_app import PetApp
+    startup_trace.mark("导入模块")
+    
     # 禁用高DPI缩放，保持像素清晰
     QApplication.setAttribute(Qt.AA_DisableHighDpiScaling)
     QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.Floor)
     
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1])
+    startup_trace.mark("QApplication")
+    
+    pet_app = PetApp(app)
+    if not pet_app.start():
+        # 与另一个同时启动的进程竞争失败，改为转发
+        reply = send_command(command or "show-pet", args)
+        if reply:
+            print(reply[1])
+        return 0
     
-    # 创建桌面宠物实例
-    pet = DesktopPet()
-    pet.show()
+    # 启动时附带的命令在本实例中执行
+    if command and command not in ("spawn-pet", "show-pet"):
+        ok, message = pet_app.handle_command(command, args)
+        print(message)
     
-    sys.exit(app.exec_()) 
\ No newline at end of file
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -7,14 +7,17 @@
 """
 
 import os
-import json
-import time
 from datetime import datetime
-from PyQt5.QtCore import Qt, QSize, QRect, QPoint
-from PyQt5.QtGui import QPainter, QColor, QFont, QPen, QFontDatabase
+from PyQt5.QtCore import (Qt, QSize, QRect, QPoint, QDateTime, QEvent,
+                          QAbstractListModel, QModelIndex, pyqtSignal)
+from PyQt5.QtGui import QPainter, QColor, QFont, QPen, QFontDatabase, QFontMetrics
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                             QTextEdit, QListWidget, QListWidgetItem, QLabel,
-                            QSplitter, QScrollArea, QFrame)
+                            QSplitter, QScrollArea, QFrame, QFileDialog,
+                            QCheckBox, QDateTimeEdit, QListView, QStyle,
+                            QStyledItemDelegate, QAbstractItemView)
+from memo_store import MemoStore, INSORT_LIMIT, insert_index, find_index
+from memo_io import MemoImportThread, MemoExportThread
 
 class PixelButton(QPushButton):
     """像素风格按钮"""
@@ -40,51 +43,182 @@ class PixelButton(QPushButton):
             }
         """)
 
-class MemoItemWidget(QWidget):
-    """备忘录项目小部件"""
+def format_timestamp(timestamp):
+    """格式化时间戳"""
+    dt = datetime.fromtimestamp(timestamp)
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+class MemoListModel(QAbstractListModel):
+    """备忘录列表模型，视图只绘制可见的行"""
     
-    def __init__(self, memo_data, parent=None):
+    def __init__(self, store, parent=None):
         super().__init__(parent)
-        self.memo_data = memo_data
-        self.init_ui()
+        self.store = store
+        # 与存储顺序一致的备忘录列表；批量导入中存储列表尚未排序，界面继续显示这份列表
+        self.rows = list(store.memos)
+        
+        store.memos_added.connect(self.on_memos_added)
+        store.memos_removed.connect(self.on_memos_removed)
+        store.memos_updated.connect(self.on_memos_updated)
+        store.memos_reset.connect(self.reset)
     
-    def init_ui(self):
-        """初始化UI"""
-        layout = QVBoxLayout(self)
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.rows[index.row()]["content"]
+        return None
+    
+    def memo_at(self, index):
+        """返回行对应的备忘录字典（经过 data() 取出的会是副本）"""
+        return self.rows[index.row()] if index.isValid() else None
+    
+    def reset(self):
+        """按存储的当前内容重建"""
+        self.beginResetModel()
+        self.rows = list(self.store.memos)
+        self.endResetModel()
+    
+    def on_memos_added(self, memos):
+        """少量新增时逐行插入，大批新增时整体重建"""
+        if len(memos) > INSORT_LIMIT:
+            # 批量导入中的大批记录等导入结束后统一显示
+            if not self.store.bulk:
+                self.reset()
+            return
+        
+        for memo in memos:
+            row = insert_index(self.rows, memo["timestamp"])
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.rows.insert(row, memo)
+            self.endInsertRows()
+    
+    def on_memos_removed(self, memos):
+        """删除对应的行"""
+        for memo in memos:
+            row = find_index(self.rows, memo)
+            if row < 0:
+                continue
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.rows[row]
+            self.endRemoveRows()
+    
+    def on_memos_updated(self, memos):
+        """通知视图重绘修改过的行"""
+        for memo in memos:
+            row = find_index(self.rows, memo)
+            if row >= 0:
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+class MemoItemDelegate(QStyledItemDelegate):
+    """绘制备忘录卡片和删除按钮"""
+    
+    # 点击了删除按钮的备忘录
+    delete_requested = pyqtSignal(object)
+    
+    # 卡片外边距、内边距、删除按钮直径和内容最多显示的行数
+    MARGIN = 5
+    PADDING = 5
+    BUTTON_SIZE = 30
+    CONTENT_LINES = 3
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.small_font = QFont()
+        self.small_font.setPixelSize(9)
+        self.content_font = QFont()
+        self.content_font.setPixelSize(12)
+        self.button_font = QFont("Arial", 12, QFont.Bold)
+        
+        self.small_height = QFontMetrics(self.small_font).height()
+        self.content_height = QFontMetrics(self.content_font).lineSpacing() * self.CONTENT_LINES
+        # 所有行等高，视图不必逐行测量
+        self.item_height = (2 * (self.MARGIN + self.PADDING) + 2 * self.small_height
+                            + self.content_height + 2 * self.PADDING)
+    
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.item_height)
+    
+    def card_rect(self, rect):
+        """卡片区域"""
+        return rect.adjusted(self.MARGIN, self.MARGIN,
+                             -(2 * self.MARGIN + self.BUTTON_SIZE), -self.MARGIN)
+    
+    def button_rect(self, rect):
+        """删除按钮区域"""
+        return QRect(rect.right() - self.MARGIN - self.BUTTON_SIZE,
+                     rect.center().y() - self.BUTTON_SIZE // 2,
+                     self.BUTTON_SIZE, self.BUTTON_SIZE)
+    
+    def paint(self, painter, option, index):
+        memo = index.model().memo_at(index)
+        if memo is None:
+            return
         
-        # 创建时间标签
-        time_label = QLabel(self.format_timestamp(self.memo_data["timestamp"]), self)
-        time_label.setStyleSheet("color: #888888; font-size: 9px;")
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
         
-        # 内容标签
-        content_label = QLabel(self.memo_data["content"], self)
-        content_label.setWordWrap(True)
-        content_label.setStyleSheet("color: white; font-size: 12px;")
+        # 卡片背景
+        card = self.card_rect(option.rect)
+        painter.setPen(QPen(QColor("#666666"), 1))
+        painter.setBrush(QColor("#333333"))
+        painter.drawRoundedRect(card, 5, 5)
         
-        # 添加到布局
-        layout.addWidget(time_label)
-        layout.addWidget(content_label)
-        layout.addSpacing(10)
+        text_rect = card.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
         
-        # 设置样式
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #333333;
-                border: 1px solid #666666;
-                border-radius: 5px;
-                padding: 5px;
-            }
-        """)
+        # 创建时间
+        painter.setFont(self.small_font)
+        painter.setPen(QColor("#888888"))
+        time_rect = QRect(text_rect.left(), text_rect.top(), text_rect.width(), self.small_height)
+        painter.drawText(time_rect, Qt.AlignLeft | Qt.AlignVCenter, format_timestamp(memo["timestamp"]))
+        
+        # 内容，超出的部分截断（完整内容见提示）
+        painter.setFont(self.content_font)
+        painter.setPen(QColor("white"))
+        content_rect = QRect(text_rect.left(), time_rect.bottom() + self.PADDING,
+                             text_rect.width(), self.content_height)
+        painter.save()
+        painter.setClipRect(content_rect)
+        painter.drawText(content_rect, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, memo["content"])
+        painter.restore()
+        
+        # 提醒时间
+        if "due" in memo:
+            due_text = "⏰ " + format_timestamp(memo["due"])
+            if memo.get("reminded"):
+                due_text += "（已提醒）"
+            painter.setFont(self.small_font)
+            painter.setPen(QColor("#FFA500"))
+            due_rect = QRect(text_rect.left(), content_rect.bottom() + self.PADDING,
+                             text_rect.width(), self.small_height)
+            painter.drawText(due_rect, Qt.AlignLeft | Qt.AlignVCenter, due_text)
+        
+        # 删除按钮，鼠标悬停在该行时加亮
+        button = self.button_rect(option.rect)
+        hovered = option.state & QStyle.State_MouseOver
+        painter.setPen(QPen(QColor("#dd5555"), 1))
+        painter.setBrush(QColor("#cc3333" if hovered else "#aa3333"))
+        painter.drawEllipse(button)
+        painter.setFont(self.button_font)
+        painter.setPen(QColor("white"))
+        painter.drawText(button, Qt.AlignCenter, "×")
+        
+        painter.restore()
     
-    def format_timestamp(self, timestamp):
-        """格式化时间戳"""
-        dt = datetime.fromtimestamp(timestamp)
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
+    def editorEvent(self, event, model, option, index):
+        """点击删除按钮时发出删除请求"""
+        if (event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton
+                and self.button_rect(option.rect).contains(event.pos())):
+            self.delete_requested.emit(model.memo_at(index))
+            return True
+        return super().editorEvent(event, model, option, index)
 
 class MemoWindow(QWidget):
     """备忘录窗口类"""
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, store=None):
         super().__init__(parent)
         
         # 窗口设置
@@ -93,11 +227,14 @@ class MemoWindow(QWidget):
         self.setWindowFlags(Qt.Window | Qt.WindowStaysOnTopHint)
         
         # 数据存储
-        self.memos = []
-        self.memo_file = "memos.json"
+        if store is None:
+            store = MemoStore("memos.json", self)
+            store.load()
+        self.store = store
         
-        # 加载备忘录数据
-        self.load_memos()
+        # 后台导入、导出线程
+        self.import_thread = None
+        self.export_thread = None
         
         # 初始化UI
         self.init_ui()
@@ -132,6 +269,30 @@ class MemoWindow(QWidget):
         """)
         input_layout.addWidget(self.text_edit)
         
+        # 提醒时间设置
+        due_layout = QHBoxLayout()
+        
+        self.due_check = QCheckBox("提醒", self)
+        self.due_check.setStyleSheet("color: white;")
+        due_layout.addWidget(self.due_check)
+        
+        self.due_edit = QDateTimeEdit(QDateTime.currentDateTime().addSecs(3600), self)
+        self.due_edit.setDisplayFormat("yyyy-MM-dd HH:mm")
+        self.due_edit.setCalendarPopup(True)
+        self.due_edit.setEnabled(False)
+        self.due_edit.setStyleSheet("""
+            QDateTimeEdit {
+                background-color: #222222;
+                color: white;
+                border: 2px solid #666666;
+                font-family: 'Courier New';
+            }
+        """)
+        self.due_check.toggled.connect(self.due_edit.setEnabled)
+        due_layout.addWidget(self.due_edit, 1)
+        
+        input_layout.addLayout(due_layout)
+        
         # 添加按钮
         add_button = PixelButton("添加备忘录", self)
         add_button.clicked.connect(self.add_memo)
@@ -139,11 +300,41 @@ class MemoWindow(QWidget):
         
         main_layout.addLayout(input_layout)
         
-        # 备忘录列表区域
-        scroll_area = QScrollArea(self)
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("""
-            QScrollArea {
+        # 导入导出按钮
+        io_layout = QHBoxLayout()
+        
+        self.import_button = PixelButton("导入", self)
+        self.import_button.clicked.connect(self.import_memos)
+        io_layout.addWidget(self.import_button)
+        
+        self.export_button = PixelButton("导出", self)
+        self.export_button.clicked.connect(self.export_memos)
+        io_layout.addWidget(self.export_button)
+        
+        main_layout.addLayout(io_layout)
+        
+        # 导入导出状态
+        self.status_label = QLabel("", self)
+        self.status_label.setStyleSheet("color: #888888; font-size: 9px;")
+        self.status_label.hide()
+        main_layout.addWidget(self.status_label)
+        
+        # 备忘录列表，只绘制可见的行
+        self.memo_model = MemoListModel(self.store, self)
+        self.memo_view = QListView(self)
+        self.memo_view.setModel(self.memo_model)
+        self.memo_delegate = MemoItemDelegate(self.memo_view)
+        self.memo_delegate.delete_requested.connect(self.delete_memo)
+        self.memo_view.setItemDelegate(self.memo_delegate)
+        self.memo_view.setUniformItemSizes(True)
+        # 分批布局，大量记录也不会在重建时卡住界面
+        self.memo_view.setLayoutMode(QListView.Batched)
+        self.memo_view.setBatchSize(1000)
+        self.memo_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.memo_view.setSelectionMode(QAbstractItemView.NoSelection)
+        self.memo_view.setMouseTracking(True)
+        self.memo_view.setStyleSheet("""
+            QListView {
                 background-color: #222222;
                 border: 2px solid #666666;
             }
@@ -160,19 +351,7 @@ class MemoWindow(QWidget):
                 background: none;
             }
         """)
-        
-        # 备忘录容器
-        self.memo_container = QWidget()
-        self.memo_layout = QVBoxLayout(self.memo_container)
-        self.memo_layout.setAlignment(Qt.AlignTop)
-        self.memo_layout.setSpacing(10)
-        self.memo_container.setLayout(self.memo_layout)
-        
-        scroll_area.setWidget(self.memo_container)
-        main_layout.addWidget(scroll_area)
-        
-        # 显示备忘录
-        self.update_memo_list()
+        main_layout.addWidget(self.memo_view)
         
         # 设置窗口样式
         self.setStyleSheet("""
@@ -182,96 +361,132 @@ class MemoWindow(QWidget):
             }
         """)
     
-    def load_memos(self):
-        """从文件加载备忘录数据"""
-        if os.path.exists(self.memo_file):
-            try:
-                with open(self.memo_file, "r", encoding="utf-8") as file:
-                    self.memos = json.load(file)
-            except (json.JSONDecodeError, IOError):
-                self.memos = []
-    
-    def save_memos(self):
-        """保存备忘录数据到文件"""
-        try:
-            with open(self.memo_file, "w", encoding="utf-8") as file:
-                json.dump(self.memos, file, ensure_ascii=False, indent=2)
-        except IOError:
-            print("无法保存备忘录数据")
-    
     def add_memo(self):
         """添加备忘录"""
         content = self.text_edit.toPlainText().strip()
         if content:
-            # 创建备忘录数据
-            memo = {
-                "content": content,
-                "timestamp": time.time()
-            }
-            
-            # 添加到列表前端
-            self.memos.insert(0, memo)
+            # 可选的提醒时间
+            due = None
+            if self.due_check.isChecked():
+                due = self.due_edit.dateTime().toSecsSinceEpoch()
             
-            # 保存备忘录
-            self.save_memos()
-            
-            # 更新UI
+            # 写入存储，列表通过信号增量更新
+            self.store.add(content, due=due)
             self.text_edit.clear()
-            self.update_memo_list()
-    
-    def update_memo_list(self):
-        """更新备忘录列表显示"""
-        # 清空现有项目
-        while self.memo_layout.count():
-            item = self.memo_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        # 添加备忘录项目
-        for memo in self.memos:
-            memo_widget = MemoItemWidget(memo, self)
-            
-            # 创建包含备忘录和删除按钮的布局
-            item_layout = QHBoxLayout()
-            item_layout.addWidget(memo_widget, 1)
-            
-            # 删除按钮
-            delete_button = QPushButton("×", self)
-            delete_button.setFixedSize(30, 30)
-            delete_button.setFont(QFont("Arial", 12, QFont.Bold))
-            delete_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #aa3333;
-                    color: white;
-                    border: 1px solid #dd5555;
-                    border-radius: 15px;
-                }
-                QPushButton:hover {
-                    background-color: #cc3333;
-                }
-                QPushButton:pressed {
-                    background-color: #882222;
-                }
-            """)
-            
-            # 连接删除信号
-            delete_button.clicked.connect(lambda checked, m=memo: self.delete_memo(m))
-            
-            item_layout.addWidget(delete_button)
-            
-            # 将整个布局添加到备忘录布局中
-            container = QWidget()
-            container.setLayout(item_layout)
-            self.memo_layout.addWidget(container)
+            self.due_check.setChecked(False)
     
     def delete_memo(self, memo):
         """删除备忘录"""
-        self.memos.remove(memo)
-        self.save_memos()
-        self.update_memo_list()
+        self.store.remove(memo)
+    
+    def import_memos(self):
+        """在后台线程中导入备忘录文件"""
+        if self.import_thread:
+            return
+        
+        path, _ = QFileDialog.getOpenFileName(
+            self, "导入备忘录", "",
+            "备忘录文件 (*.json *.jsonl *.ndjson *.csv);;所有文件 (*)")
+        if not path:
+            return
+        
+        self.import_added = 0
+        self.import_thread = MemoImportThread(path, self.store, parent=self)
+        # 导入期间列表只追加记录，结束后排序一次并重建显示
+        self.store.begin_bulk()
+        self.import_thread.batch_ready.connect(self.on_import_batch)
+        self.import_thread.progress.connect(self.on_import_progress)
+        self.import_thread.finished_import.connect(self.on_import_finished)
+        self.import_thread.failed.connect(self.on_import_failed)
+        self.import_thread.finished.connect(self.on_import_thread_done)
+        
+        self.import_button.setEnabled(False)
+        self.status_label.setText("正在导入...")
+        self.status_label.show()
+        self.import_thread.start()
+    
+    def on_import_batch(self, memos):
+        """在界面线程中把一批导入记录写入存储"""
+        self.import_added += self.store.add_batch(memos)
+    
+    def on_import_progress(self, count, done_bytes, total_bytes):
+        """显示导入进度"""
+        percent = done_bytes * 100 // total_bytes if total_bytes else 100
+        self.status_label.setText(f"正在导入... {percent}% ({count} 条)")
+    
+    def on_import_finished(self, read_count, added_count):
+        """导入完成后统一排序和保存一次"""
+        self.store.end_bulk()
+        self.store.save()
+        self.status_label.setText(f"导入完成：读取 {read_count} 条，新增 {self.import_added} 条")
+    
+    def on_import_failed(self, message):
+        """导入失败"""
+        self.status_label.setText(f"导入失败：{message}")
+    
+    def on_import_thread_done(self):
+        """导入线程结束"""
+        self.import_thread.deleteLater()
+        self.import_thread = None
+        # 导入失败或被取消时也要结束批量模式
+        self.store.end_bulk()
+        self.import_button.setEnabled(True)
+    
+    def export_memos(self):
+        """在后台线程中导出备忘录到文件"""
+        if self.export_thread:
+            return
+        
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出备忘录", "memos.jsonl",
+            "JSON Lines (*.jsonl);;CSV (*.csv);;JSON (*.json)")
+        if not path:
+            return
+        
+        # 在界面线程中复制列表，导出期间的增删不影响子线程
+        self.export_thread = MemoExportThread(list(self.store.memos), path, parent=self)
+        self.export_thread.progress.connect(self.on_export_progress)
+        self.export_thread.finished_export.connect(self.on_export_finished)
+        self.export_thread.failed.connect(self.on_export_failed)
+        self.export_thread.finished.connect(self.on_export_thread_done)
+        
+        self.export_button.setEnabled(False)
+        self.status_label.setText("正在导出...")
+        self.status_label.show()
+        self.export_thread.start()
+    
+    def on_export_progress(self, done, total):
+        """显示导出进度"""
+        percent = done * 100 // total if total else 100
+        self.status_label.setText(f"正在导出... {percent}% ({done} 条)")
+    
+    def on_export_finished(self, count):
+        """导出完成"""
+        self.status_label.setText(f"已导出 {count} 条")
+    
+    def on_export_failed(self, message):
+        """导出失败"""
+        self.status_label.setText(f"导出失败：{message}")
+    
+    def on_export_thread_done(self):
+        """导出线程结束"""
+        self.export_thread.deleteLater()
+        self.export_thread = None
+        self.export_button.setEnabled(True)
     
     def closeEvent(self, event):
         """窗口关闭事件"""
+        # 停止未完成的导入
+        if self.import_thread:
+            self.import_thread.requestInterruption()
+            self.import_thread.wait()
+            self.store.end_bulk()
+        
+        # 取消未完成的导出，不留下不完整的文件
+        if self.export_thread:
+            self.export_thread.requestInterruption()
+            self.export_thread.wait()
+        
         # 关闭窗口时保存备忘录
-        self.save_memos()
+        self.store.save()
         event.accept() 
\ No newline at end of file
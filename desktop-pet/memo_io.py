@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+备忘录导入导出模块
+以流式方式读写 JSON Lines、CSV 和旧版 memos.json 数组格式，
+导入时按内容+时间戳哈希去重（来源记录没有时间戳时只按内容去重），并分批写入存储层
+
+命令行用法：
+    python memo_io.py import <文件> [--format jsonl|csv|json]
+    python memo_io.py export <文件> [--format jsonl|csv|json]
+"""
+
+import os
+import sys
+import csv
+import json
+from PyQt5.QtCore import QThread, pyqtSignal
+from memo_store import MemoStore, normalize_memo, source_hash
+
+# 支持的格式
+FORMATS = ("jsonl", "csv", "json")
+
+# CSV 列
+CSV_FIELDS = ["id", "content", "timestamp", "due", "reminded"]
+
+# 每批写入的记录数
+BATCH_SIZE = 1000
+
+# 读取旧版数组格式时的块大小
+CHUNK_SIZE = 64 * 1024
+
+
+def guess_format(path):
+    """根据文件扩展名推断格式"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if ext == ".csv":
+        return "csv"
+    return "json"
+
+
+def iter_jsonl(file):
+    """逐行读取 JSON Lines"""
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+
+def iter_csv(file):
+    """逐行读取 CSV（需包含 content 列，timestamp 列可选）"""
+    for row in csv.DictReader(file):
+        yield row
+
+
+def iter_json_array(file, chunk_size=CHUNK_SIZE):
+    """
+    分块增量解析 JSON 数组，每次只保留一个元素的缓冲
+
+    只有解析错误出现在缓冲末尾（元素被块边界截断）时才继续读入，
+    其他错误说明文件内容有误，抛出 ValueError
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+    count = 0
+
+    while True:
+        # 跳过空白和分隔符
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+
+        if pos >= len(buffer):
+            if eof:
+                return
+            chunk = file.read(chunk_size)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            eof = not chunk
+            continue
+
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("文件内容不是 JSON 数组")
+            started = True
+            pos += 1
+            continue
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            # 错误位于缓冲末尾（最长的 \uXXXX 转义之内）或字符串未结束时，元素可能只是被截断
+            truncated = e.pos >= len(buffer) - 6 or e.msg.startswith("Unterminated string")
+            if eof or not truncated:
+                raise ValueError(f"第 {count + 1} 条记录格式错误：{e.msg}")
+            item, end = None, None
+
+        # 元素被截断或可能在块边界被截断（如数字）时，继续读入数据
+        if end is None or (end >= len(buffer) and not eof):
+            chunk = file.read(chunk_size)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            eof = not chunk
+            continue
+
+        count += 1
+        yield item
+        pos = end
+
+
+READERS = {
+    "jsonl": iter_jsonl,
+    "csv": iter_csv,
+    "json": iter_json_array,
+}
+
+
+def import_memos(path, store, fmt=None, batch_size=BATCH_SIZE, progress=None,
+                 on_batch=None, is_cancelled=None, known_hashes=None):
+    """
+    流式导入备忘录
+
+    每凑够 batch_size 条新记录调用一次 on_batch（默认直接写入 store），
+    on_batch 返回实际新增的数量（按ID去重后可能更少），返回None时按批次大小计数，
+    progress(已读记录数, 已读字节数, 总字节数) 用于报告进度，
+    known_hashes 为已有记录的哈希快照（默认取 store.known_keys()）；
+    没有时间戳的来源记录只按内容去重。
+    返回 (读取数, 新增数)。
+    """
+    fmt = fmt or guess_format(path)
+    reader = READERS[fmt]
+    total_bytes = os.path.getsize(path)
+
+    if on_batch is None:
+        on_batch = store.add_batch
+
+    # 已存在的哈希加上本次导入中出现过的哈希
+    seen = store.known_keys() if known_hashes is None else set(known_hashes)
+    batch = []
+    read_count = 0
+    added_count = 0
+
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        for item in reader(file):
+            read_count += 1
+
+            memo = normalize_memo(item)
+            if memo is not None:
+                key = source_hash(item, memo)
+                if key not in seen:
+                    seen.add(key)
+                    batch.append(memo)
+
+            if len(batch) >= batch_size:
+                added = on_batch(batch)
+                added_count += len(batch) if added is None else added
+                batch = []
+                if progress:
+                    progress(read_count, file.buffer.tell(), total_bytes)
+                if is_cancelled and is_cancelled():
+                    break
+
+        if batch:
+            added = on_batch(batch)
+            added_count += len(batch) if added is None else added
+
+    if progress:
+        progress(read_count, total_bytes, total_bytes)
+
+    return read_count, added_count
+
+
+def export_memos(memos, path, fmt=None, progress=None, is_cancelled=None):
+    """
+    流式导出备忘录，返回导出数量，被取消时返回None
+
+    先写入同目录的临时文件再替换目标文件，写入出错或被取消时删除临时文件
+    """
+    fmt = fmt or guess_format(path)
+    total = len(memos)
+    tmp_path = path + ".tmp"
+
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as file:
+            completed = write_export(file, memos, fmt, progress, is_cancelled)
+        if not completed:
+            return None
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    if progress:
+        progress(total, total)
+    return total
+
+
+def write_export(file, memos, fmt, progress=None, is_cancelled=None):
+    """按格式把备忘录写入已打开的文件，被取消时返回False"""
+    total = len(memos)
+    if fmt == "csv":
+        writer = csv.DictWriter(file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+    elif fmt == "json":
+        file.write("[")
+
+    for index, memo in enumerate(memos):
+        if fmt == "csv":
+            writer.writerow(memo)
+        elif fmt == "jsonl":
+            file.write(json.dumps(memo, ensure_ascii=False))
+            file.write("\n")
+        else:
+            # 与旧版 memos.json 保持相同的缩进格式
+            text = json.dumps(memo, ensure_ascii=False, indent=2)
+            file.write(",\n  " if index else "\n  ")
+            file.write(text.replace("\n", "\n  "))
+
+        if (index + 1) % BATCH_SIZE == 0:
+            if progress:
+                progress(index + 1, total)
+            if is_cancelled and is_cancelled():
+                return False
+
+    if fmt == "json":
+        file.write("\n]" if total else "]")
+    return True
+
+
+class MemoImportThread(QThread):
+    """后台导入线程，解析和去重在子线程完成，批次通过信号交给界面线程写入"""
+
+    # 一批待写入的备忘录
+    batch_ready = pyqtSignal(object)
+    # 进度：已读记录数、已读字节数、总字节数
+    progress = pyqtSignal(int, 'qint64', 'qint64')
+    # 完成：读取数、新增数
+    finished_import = pyqtSignal(int, int)
+    # 出错信息
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, store, fmt=None, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.store = store
+        self.fmt = fmt
+        # 在界面线程中取哈希快照，避免子线程遍历时集合被修改
+        self.known_hashes = store.known_keys()
+
+    def run(self):
+        """在子线程中执行导入"""
+        try:
+            read_count, added_count = import_memos(
+                self.path, self.store, self.fmt,
+                progress=self.progress.emit,
+                on_batch=self.batch_ready.emit,
+                is_cancelled=self.isInterruptionRequested,
+                known_hashes=self.known_hashes
+            )
+        except (IOError, ValueError, csv.Error) as e:
+            self.failed.emit(str(e))
+            return
+
+        self.finished_import.emit(read_count, added_count)
+
+
+class MemoExportThread(QThread):
+    """后台导出线程"""
+
+    # 进度：已写入数、总数
+    progress = pyqtSignal(int, int)
+    # 完成：导出数
+    finished_export = pyqtSignal(int)
+    # 出错信息
+    failed = pyqtSignal(str)
+
+    def __init__(self, memos, path, fmt=None, parent=None):
+        super().__init__(parent)
+        # memos 应为界面线程中取的列表副本；提醒状态只修改已有的键，子线程读取是安全的
+        self.memos = memos
+        self.path = path
+        self.fmt = fmt
+
+    def run(self):
+        """在子线程中执行导出"""
+        try:
+            count = export_memos(self.memos, self.path, self.fmt,
+                                 progress=self.progress.emit,
+                                 is_cancelled=self.isInterruptionRequested)
+        except (IOError, ValueError, csv.Error) as e:
+            self.failed.emit(str(e))
+            return
+
+        if count is not None:
+            self.finished_export.emit(count)
+
+
+def main(argv):
+    """命令行入口"""
+    if len(argv) < 2 or argv[0] not in ("import", "export"):
+        print(__doc__)
+        return 1
+
+    command, path = argv[0], argv[1]
+    fmt = None
+    if "--format" in argv:
+        index = argv.index("--format")
+        if index + 1 < len(argv) and argv[index + 1] in FORMATS:
+            fmt = argv[index + 1]
+
+    store = MemoStore()
+    store.load()
+
+    def report(done, *rest):
+        print(f"\r已处理 {done} 条", end="", file=sys.stderr)
+
+    if command == "import":
+        store.begin_bulk()
+        try:
+            read_count, added_count = import_memos(path, store, fmt, progress=report)
+        except (IOError, ValueError, csv.Error) as e:
+            print(f"\n导入失败：{e}", file=sys.stderr)
+            return 1
+        finally:
+            store.end_bulk()
+        # 与运行中的程序一样加锁写入，并合并其间其他实例的修改
+        if not store.save():
+            print(f"\n保存失败：{store.writer.last_error}", file=sys.stderr)
+            return 1
+        print(f"\n读取 {read_count} 条，新增 {added_count} 条")
+    else:
+        try:
+            count = export_memos(store.memos, path, fmt, progress=report)
+        except (IOError, ValueError, csv.Error) as e:
+            print(f"\n导出失败：{e}", file=sys.stderr)
+            return 1
+        print(f"\n导出 {count} 条")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
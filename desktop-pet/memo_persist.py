@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+备忘录异步持久化模块
+界面线程只提交变更批次，后台线程合并一段时间内的变更后原子写入文件；
+加锁、合并和写入由 memo_store.MemoFileWriter 完成
+"""
+
+import time
+import queue
+import threading
+from memo_store import MemoFileWriter, file_stamp
+
+# 合并变更的防抖时间（秒）
+DEBOUNCE_SECONDS = 0.5
+
+# 退出时等待写入完成的最长时间（秒）
+FLUSH_TIMEOUT = 2.0
+
+
+class MemoPersistWorker(MemoFileWriter):
+    """备忘录持久化后台线程"""
+
+    background = True
+
+    def __init__(self, memo_file, memos, debounce=DEBOUNCE_SECONDS):
+        # 后台线程自己维护数据副本，只在后台线程中读写
+        super().__init__(memo_file, memos, file_stamp(memo_file))
+        self.debounce = debounce
+
+        # 变更批次队列，元素为 (操作, 备忘录快照) 组成的元组
+        self.queue = queue.Queue()
+
+        self.thread = threading.Thread(target=self.run, name="MemoPersistWorker", daemon=True)
+        self.thread.start()
+
+    def submit(self, changes):
+        """提交一批变更，changes 为 (操作, 备忘录) 序列，操作为 add/remove/update"""
+        batch = tuple((op, dict(memo)) for op, memo in changes)
+        if not batch:
+            return
+        self.submitted += 1
+        self.queue.put(batch)
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """
+        立即写入所有已提交的变更
+
+        timeout 为 None 时不等待；否则最多等待 timeout 秒，返回是否写入完成
+        """
+        done = threading.Event()
+        self.queue.put(done)
+        if timeout is None:
+            return False
+        return done.wait(timeout)
+
+    def stop(self, timeout=FLUSH_TIMEOUT):
+        """写入剩余变更并结束后台线程，返回是否在限定时间内完成"""
+        self.queue.put(None)
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+    def run(self):
+        """后台线程主循环"""
+        running = True
+        unwritten = 0  # 已应用但未写入的批次数
+        while running:
+            item = self.queue.get()
+            events = []
+
+            # 收集防抖窗口内的所有变更
+            deadline = time.monotonic() + self.debounce
+            while True:
+                if item is None:
+                    running = False
+                    break
+                if isinstance(item, threading.Event):
+                    events.append(item)
+                    break
+
+                self.apply(item)
+                unwritten += 1
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            # 写入失败时保留未写入计数，下一批变更到来时重试
+            if unwritten and self.write():
+                self.written += unwritten
+                unwritten = 0
+
+            for event in events:
+                event.set()
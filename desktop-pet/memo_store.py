@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+备忘录存储模块
+统一管理备忘录数据的加载、去重、批量写入和持久化
+"""
+
+import os
+import json
+import stat
+import time
+import uuid
+import hashlib
+import tempfile
+from operator import itemgetter
+from PyQt5.QtCore import QObject, QLockFile, pyqtSignal
+
+# 备忘录的排序键
+by_timestamp = itemgetter("timestamp")
+
+# 一批新增不超过该数量时逐条二分插入，否则追加后归并
+INSORT_LIMIT = 32
+
+# 获取文件锁的最长等待时间（毫秒）
+LOCK_TIMEOUT = 1000
+
+
+def memo_hash(content, timestamp):
+    """计算备忘录去重哈希（内容+时间戳），返回64位整数以节省内存"""
+    key = f"{content}\x00{float(timestamp)!r}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+def content_hash(content):
+    """只按内容计算的去重哈希，用于来源记录没有时间戳的情况"""
+    key = f"\x01{content}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+def source_hash(data, memo):
+    """
+    按来源记录计算去重哈希
+
+    来源带时间戳时与 memo_hash 相同；没有时间戳时 normalize_memo 会填入当前时间，
+    只能按内容去重，否则每次导入同一文件都会重复新增
+    """
+    timestamp = data.get("timestamp") if isinstance(data, dict) else None
+    if timestamp is None or timestamp == "":
+        return content_hash(memo["content"])
+    return memo_hash(memo["content"], memo["timestamp"])
+
+
+def insert_index(memos, timestamp):
+    """在按时间从新到旧排列的列表中二分查找插入位置（排在相同时间戳的记录之前）"""
+    lo, hi = 0, len(memos)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if memos[mid]["timestamp"] > timestamp:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def find_index(memos, memo):
+    """在按时间从新到旧排列的列表中查找备忘录对象的位置，不存在时返回-1"""
+    timestamp = memo["timestamp"]
+    index = insert_index(memos, timestamp)
+
+    # 时间戳相同的记录依次比较
+    while index < len(memos) and memos[index]["timestamp"] == timestamp:
+        if memos[index] is memo:
+            return index
+        index += 1
+    return -1
+
+
+def file_stamp(path):
+    """返回文件的版本戳 (修改时间, 大小, inode)，文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def read_memo_file(path):
+    """
+    读取并规范化备忘录文件，返回 (备忘录列表, 版本戳)
+
+    文件不存在时返回空列表；文件损坏或正在被写入时返回None，调用方不应据此删除数据
+    """
+    stamp = file_stamp(path)
+    if stamp is None:
+        return [], None
+
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (json.JSONDecodeError, IOError):
+        return None, stamp
+
+    if not isinstance(data, list):
+        return None, stamp
+
+    memos = []
+    for item in data:
+        memo = normalize_memo(item)
+        if memo is not None:
+            memos.append(memo)
+    return memos, stamp
+
+
+def file_mode(path):
+    """已有文件的权限位；文件不存在时返回按 umask 计算的新文件默认权限"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_memo_file(path, memos):
+    """原子地写入备忘录文件（先写同目录下的临时文件再替换）"""
+    directory = os.path.dirname(os.path.abspath(path))
+    # mkstemp 创建的文件权限为0600，替换前改为原文件的权限，避免共享文件夹中其他用户无法读取
+    mode = file_mode(path)
+    fd, tmp_file = tempfile.mkstemp(prefix=".memos-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(memos, file, ensure_ascii=False, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(tmp_file, mode)
+        os.replace(tmp_file, path)
+    except OSError:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+def normalize_memo(data):
+    """规范化一条备忘录记录，无效记录返回None"""
+    if not isinstance(data, dict):
+        return None
+
+    content = data.get("content")
+    if not isinstance(content, str) or not content.strip():
+        return None
+
+    timestamp = data.get("timestamp")
+    if timestamp is None or timestamp == "":
+        timestamp = time.time()
+    try:
+        timestamp = float(timestamp)
+    except (TypeError, ValueError):
+        return None
+
+    memo = {
+        "id": str(data.get("id") or uuid.uuid4().hex),
+        "content": content,
+        "timestamp": timestamp
+    }
+
+    # 可选的提醒时间
+    due = data.get("due")
+    if due is not None and due != "":
+        try:
+            memo["due"] = float(due)
+        except (TypeError, ValueError):
+            pass
+        else:
+            reminded = data.get("reminded", False)
+            if isinstance(reminded, str):
+                reminded = reminded.lower() in ("1", "true", "yes")
+            memo["reminded"] = bool(reminded)
+
+    return memo
+
+
+class MemoFileWriter:
+    """
+    同步写入备忘录文件
+
+    维护一份按ID索引的数据副本，写入时持有文件锁；文件被其他实例修改过时
+    先按备忘录ID合并，不会覆盖其他实例的新增，也不会恢复它们删除的记录
+    """
+
+    # 是否在后台线程中写入
+    background = False
+
+    def __init__(self, memo_file, memos, stamp, disk_ids=None):
+        self.memo_file = memo_file
+
+        # 数据副本：备忘录ID -> 备忘录
+        self.state = {memo["id"]: dict(memo) for memo in memos}
+
+        # 上次读写时文件中的备忘录ID和版本戳
+        self.disk_ids = frozenset(self.state if disk_ids is None else disk_ids)
+        self.last_stamp = stamp
+        # 只包含本实例数据的最近一次写入的版本戳，合并过其他实例的修改时为None
+        self.own_stamp = None
+
+        # 多个实例之间串行化“读取-合并-写入”
+        self.lock = QLockFile(memo_file + ".lock")
+        # 上次写入后本实例删除的备忘录ID和哈希
+        self.removed_keys = set()
+
+        # 统计信息
+        self.submitted = 0            # 已提交的批次数
+        self.written = 0              # 已写入文件的批次数
+        self.last_flush_latency = 0.0  # 最近一次写入耗时（毫秒）
+        self.last_flush_time = None   # 最近一次写入完成的时间
+        self.last_error = None        # 最近一次写入错误
+
+    @property
+    def queue_depth(self):
+        """尚未写入文件的变更批次数"""
+        return self.submitted - self.written
+
+    def summary(self):
+        """简短的统计文字"""
+        lines = [f"待写入批次：{self.queue_depth}"]
+        if self.last_flush_time is None:
+            lines.append("尚未写入")
+        else:
+            written_at = time.strftime("%H:%M:%S", time.localtime(self.last_flush_time))
+            lines.append(f"最近写入：{written_at}，耗时 {self.last_flush_latency:.1f} 毫秒")
+        if self.last_error:
+            lines.append(f"写入错误：{self.last_error}")
+        return "\n".join(lines)
+
+    def submit(self, changes):
+        """提交一批变更，changes 为 (操作, 备忘录) 序列，操作为 add/remove/update"""
+        batch = tuple((op, dict(memo)) for op, memo in changes)
+        if batch:
+            self.submitted += 1
+            self.apply(batch)
+
+    def flush(self, timeout=None):
+        """立即写入文件，返回是否成功（同步写入，timeout 不起作用）"""
+        if not self.write():
+            return False
+        self.written = self.submitted
+        return True
+
+    def apply(self, batch):
+        """把一批变更应用到数据副本"""
+        for op, memo in batch:
+            if op == "remove":
+                self.state.pop(memo["id"], None)
+                self.removed_keys.add(memo["id"])
+                self.removed_keys.add(memo_hash(memo["content"], memo["timestamp"]))
+            else:
+                self.state[memo["id"]] = memo
+
+    def write(self):
+        """原子地写入文件，返回是否成功"""
+        start = time.perf_counter()
+        if not self.lock.tryLock(LOCK_TIMEOUT):
+            self.last_error = "备忘录文件被其他实例锁定"
+            return False
+
+        try:
+            # 其他实例修改过文件时先合并
+            merged = file_stamp(self.memo_file) != self.last_stamp
+            if merged:
+                self.merge_from_disk()
+
+            memos = sorted(self.state.values(), key=by_timestamp, reverse=True)
+            write_memo_file(self.memo_file, memos)
+            self.last_stamp = file_stamp(self.memo_file)
+            self.own_stamp = None if merged else self.last_stamp
+        except OSError as e:
+            self.last_error = str(e)
+            print("无法保存备忘录数据")
+            return False
+        finally:
+            self.lock.unlock()
+
+        self.disk_ids = frozenset(self.state)
+        self.removed_keys.clear()
+
+        self.last_error = None
+        self.last_flush_latency = (time.perf_counter() - start) * 1000
+        self.last_flush_time = time.time()
+        return True
+
+    def merge_from_disk(self):
+        """按备忘录ID（或内容+时间戳）把文件中的修改合并到数据副本"""
+        memos, _ = read_memo_file(self.memo_file)
+        if memos is None:
+            # 文件损坏或正在被写入时不合并
+            return
+
+        hashes = {memo_hash(m["content"], m["timestamp"]): m for m in self.state.values()}
+        seen = set()
+        for memo in memos:
+            ours = self.state.get(memo["id"])
+            if ours is None:
+                ours = hashes.get(memo_hash(memo["content"], memo["timestamp"]))
+
+            if ours is not None:
+                seen.add(ours["id"])
+                # 提醒状态以已提醒为准
+                if memo.get("reminded") and not ours.get("reminded"):
+                    self.state[ours["id"]] = dict(ours, reminded=True)
+            elif (memo["id"] not in self.removed_keys
+                  and memo_hash(memo["content"], memo["timestamp"]) not in self.removed_keys):
+                # 其他实例新增的备忘录
+                self.state[memo["id"]] = memo
+                seen.add(memo["id"])
+
+        # 上次写入后被其他实例删除的备忘录
+        for memo_id in list(self.state):
+            if memo_id not in seen and memo_id in self.disk_ids:
+                del self.state[memo_id]
+
+
+class MemoStore(QObject):
+    """备忘录数据存储，按创建时间从新到旧排列"""
+
+    # 新增的备忘录列表
+    memos_added = pyqtSignal(object)
+    # 被删除的备忘录列表
+    memos_removed = pyqtSignal(object)
+    # 被修改的备忘录列表
+    memos_updated = pyqtSignal(object)
+    # 列表整体发生变化（批量导入结束），界面需要重建
+    memos_reset = pyqtSignal()
+
+    def __init__(self, memo_file="memos.json", parent=None):
+        super().__init__(parent)
+        self.memo_file = memo_file
+        self.memos = []
+        self.hashes = {}     # 去重哈希 -> 备忘录
+        self.by_id = {}      # 备忘录ID -> 备忘录
+        self.removed_keys = set()  # 本次运行中删除的备忘录ID和哈希，同步时不再恢复
+        self.stamp = None    # 加载时文件的版本戳
+        self.disk_ids = frozenset()  # 加载时文件中的备忘录ID
+        self.writer = None   # 持久化写入器，未设置时首次保存前创建同步写入器
+        self.bulk = False    # 批量导入中：新增记录只追加，结束时统一排序
+
+    def load(self):
+        """从文件加载备忘录数据"""
+        self.memos = []
+        self.hashes = {}
+        self.by_id = {}
+
+        memos, self.stamp = read_memo_file(self.memo_file)
+        for memo in memos or []:
+            key = memo_hash(memo["content"], memo["timestamp"])
+            if key in self.hashes or memo["id"] in self.by_id:
+                continue
+            self.hashes[key] = memo
+            self.by_id[memo["id"]] = memo
+            self.memos.append(memo)
+
+        # 保证列表按时间从新到旧排列，便于二分查找
+        self.memos.sort(key=by_timestamp, reverse=True)
+        self.disk_ids = frozenset(self.by_id)
+
+    def attach_writer(self, writer):
+        """设置后台持久化线程，之后的修改只提交变更批次"""
+        self.writer = writer
+
+    def get_writer(self):
+        """返回持久化写入器，没有后台线程时创建同步写入器（同样加锁并合并其他实例的修改）"""
+        if self.writer is None:
+            self.writer = MemoFileWriter(self.memo_file, self.memos, self.stamp, self.disk_ids)
+        return self.writer
+
+    def persist(self, changes):
+        """持久化一批变更，changes 为 (操作, 备忘录) 列表"""
+        writer = self.get_writer()
+        writer.submit(changes)
+        if not writer.background:
+            writer.flush()
+
+    def save(self):
+        """
+        保存所有已提交的变更，返回是否成功
+
+        有后台线程时只请求立即写入，不等待结果，不阻塞界面
+        """
+        return self.get_writer().flush(timeout=None)
+
+    def position(self, memo):
+        """查找备忘录在列表中的位置，不存在时返回-1"""
+        if not self.bulk:
+            return find_index(self.memos, memo)
+
+        # 批量导入中列表尚未排序，只能逐个比较
+        for index, item in enumerate(self.memos):
+            if item is memo:
+                return index
+        return -1
+
+    def contains(self, content, timestamp):
+        """判断是否已存在相同内容和时间戳的备忘录"""
+        return memo_hash(content, timestamp) in self.hashes
+
+    def known_keys(self):
+        """导入时用于去重的哈希：已有记录的内容+时间戳哈希和内容哈希"""
+        keys = set(self.hashes)
+        keys.update(content_hash(memo["content"]) for memo in self.memos)
+        return keys
+
+    def was_removed(self, memo):
+        """判断备忘录是否在本次运行中被删除过"""
+        return (memo["id"] in self.removed_keys
+                or memo_hash(memo["content"], memo["timestamp"]) in self.removed_keys)
+
+    def find(self, memo):
+        """按ID或内容+时间戳查找已有的备忘录"""
+        found = self.by_id.get(memo["id"])
+        if found is None:
+            found = self.hashes.get(memo_hash(memo["content"], memo["timestamp"]))
+        return found
+
+    def add(self, content, timestamp=None, due=None):
+        """新建一条备忘录并放到最前面，返回新备忘录"""
+        memo = normalize_memo({
+            "content": content,
+            "timestamp": time.time() if timestamp is None else timestamp,
+            "due": due
+        })
+        if memo is None:
+            return None
+
+        key = memo_hash(memo["content"], memo["timestamp"])
+        if key in self.hashes:
+            return None
+
+        self.hashes[key] = memo
+        self.by_id[memo["id"]] = memo
+        if self.bulk:
+            self.memos.append(memo)
+        else:
+            self.memos.insert(0, memo)
+        self.persist([("add", memo)])
+        self.memos_added.emit([memo])
+        return memo
+
+    def add_batch(self, memos, persist=True):
+        """
+        批量写入备忘录，返回实际新增的数量
+
+        无后台线程时只提交变更，调用 save() 时才写入；
+        persist 为 False 时只更新内存（用于应用其他实例的修改）
+        """
+        added = []
+        for item in memos:
+            memo = normalize_memo(item)
+            if memo is None:
+                continue
+            key = memo_hash(memo["content"], memo["timestamp"])
+            if key in self.hashes or memo["id"] in self.by_id:
+                continue
+            self.hashes[key] = memo
+            self.by_id[memo["id"]] = memo
+            added.append(memo)
+
+        if not added:
+            return 0
+
+        if self.bulk:
+            # 批量导入中只追加，结束时统一排序
+            self.memos.extend(added)
+        elif len(added) <= INSORT_LIMIT:
+            for memo in added:
+                self.memos.insert(insert_index(self.memos, memo["timestamp"]), memo)
+        else:
+            # 原列表和排好序的新批次是两段有序序列，排序只需线性归并
+            added.sort(key=by_timestamp, reverse=True)
+            self.memos.extend(added)
+            self.memos.sort(key=by_timestamp, reverse=True)
+        if persist:
+            self.get_writer().submit([("add", memo) for memo in added])
+        self.memos_added.emit(added)
+        return len(added)
+
+    def begin_bulk(self):
+        """开始批量导入，之后的新增记录不再逐批排序"""
+        self.bulk = True
+
+    def end_bulk(self):
+        """结束批量导入：排序一次并通知界面重建"""
+        if not self.bulk:
+            return
+        self.bulk = False
+        self.memos.sort(key=by_timestamp, reverse=True)
+        self.memos_reset.emit()
+
+    def remove(self, memo):
+        """删除备忘录"""
+        if self.discard(memo):
+            self.removed_keys.add(memo["id"])
+            self.removed_keys.add(memo_hash(memo["content"], memo["timestamp"]))
+            self.persist([("remove", memo)])
+            self.memos_removed.emit([memo])
+
+    def discard(self, memo):
+        """从内存中移除备忘录，返回是否存在"""
+        index = self.position(memo)
+        if index < 0:
+            return False
+
+        del self.memos[index]
+        self.hashes.pop(memo_hash(memo["content"], memo["timestamp"]), None)
+        self.by_id.pop(memo["id"], None)
+        return True
+
+    def mark_reminded(self, memos):
+        """标记备忘录的提醒已触发"""
+        for memo in memos:
+            memo["reminded"] = True
+        self.persist([("update", memo) for memo in memos])
+        self.memos_updated.emit(list(memos))
+
+    def apply_remote(self, added, removed, reminded):
+        """应用其他实例写入的修改，只更新内存和界面，不再次持久化"""
+        if added:
+            self.add_batch(added, persist=False)
+
+        removed = [memo for memo in removed if self.discard(memo)]
+        if removed:
+            self.memos_removed.emit(removed)
+
+        if reminded:
+            for memo in reminded:
+                memo["reminded"] = True
+            self.memos_updated.emit(list(reminded))
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+备忘录多实例同步模块
+监视 memos.json 的变化，只把其他实例新增、删除或修改的记录增量应用到内存和界面
+"""
+
+import os
+import threading
+from PyQt5.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+from memo_store import file_stamp, read_memo_file
+
+# 文件变化后等待多久再读取（毫秒），合并连续的变化通知
+CHECK_DELAY = 200
+
+
+class MemoSync(QObject):
+    """备忘录文件同步"""
+
+    # 后台读取完成：备忘录列表、版本戳
+    file_loaded = pyqtSignal(object, object)
+
+    def __init__(self, store, writer=None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.writer = writer
+        self.memo_file = os.path.abspath(store.memo_file)
+
+        # 最近一次处理过的版本戳和当时文件中的备忘录ID
+        self.seen_stamp = store.stamp
+        self.known_ids = set(store.by_id)
+
+        # 后台读取状态
+        self.loading = False
+        self.check_again = False
+
+        # 合并连续通知的计时器
+        self.check_timer = QTimer(self)
+        self.check_timer.setSingleShot(True)
+        self.check_timer.timeout.connect(self.check)
+
+        # 同时监视文件和所在目录，原子替换后文件监视会失效
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPath(os.path.dirname(self.memo_file))
+        if os.path.exists(self.memo_file):
+            self.watcher.addPath(self.memo_file)
+        self.watcher.fileChanged.connect(self.schedule_check)
+        self.watcher.directoryChanged.connect(self.schedule_check)
+
+        self.file_loaded.connect(self.on_file_loaded)
+
+    def schedule_check(self, path=None):
+        """收到变化通知后延迟检查"""
+        self.check_timer.start(CHECK_DELAY)
+
+    def check(self):
+        """比较版本戳，确有变化时在后台读取文件"""
+        if self.memo_file not in self.watcher.files() and os.path.exists(self.memo_file):
+            self.watcher.addPath(self.memo_file)
+
+        stamp = file_stamp(self.memo_file)
+        if stamp is None or stamp == self.seen_stamp:
+            return
+
+        # 本实例刚写入且未合并其他实例修改的版本无需处理
+        if self.writer and stamp == self.writer.own_stamp:
+            self.seen_stamp = stamp
+            return
+
+        if self.loading:
+            self.check_again = True
+            return
+
+        self.loading = True
+        threading.Thread(target=self.load_file, daemon=True).start()
+
+    def load_file(self):
+        """在后台线程中读取文件"""
+        memos, stamp = read_memo_file(self.memo_file)
+        self.file_loaded.emit(memos, stamp)
+
+    def on_file_loaded(self, memos, stamp):
+        """在界面线程中计算差异并增量应用"""
+        self.loading = False
+
+        if memos is not None:
+            self.apply(memos)
+            self.seen_stamp = stamp
+
+        if self.check_again:
+            self.check_again = False
+            self.check()
+
+    def apply(self, memos):
+        """按备忘录ID（或内容+时间戳）比较文件与内存中的数据"""
+        added = []
+        reminded = []
+        present = set()
+        disk_ids = set()
+
+        for memo in memos:
+            disk_ids.add(memo["id"])
+            ours = self.store.find(memo)
+            if ours is None:
+                added.append(memo)
+                continue
+
+            present.add(ours["id"])
+            if memo.get("reminded") and "due" in ours and not ours.get("reminded"):
+                reminded.append(ours)
+
+        # 曾经写入过文件、现在却不在文件中的备忘录已被其他实例删除；
+        # 本实例新增但还没写入的备忘录不在此列
+        known_ids = self.known_ids
+        if self.writer:
+            known_ids = known_ids | self.writer.disk_ids
+        removed = [memo for memo_id, memo in self.store.by_id.items()
+                   if memo_id not in present and memo_id in known_ids]
+
+        # 本实例已删除的备忘录不应重新加入
+        added = [memo for memo in added if not self.store.was_removed(memo)]
+
+        self.known_ids = disk_ids | present
+        if added or removed or reminded:
+            self.store.apply_remote(added, removed, reminded)
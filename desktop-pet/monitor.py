@@ -3,15 +3,19 @@
 
 """
 系统监控功能模块
-实现像素风格UI的系统资源监控，包括CPU使用率、内存使用率和网络流量
+实现像素风格UI的系统资源监控，包括CPU使用率、内存使用率、网络流量和正在触发的告警
 """
 
 import os
 import time
-import psutil
 from PyQt5.QtCore import Qt, QTimer, QRect, QSize
 from PyQt5.QtGui import QPainter, QColor, QFont, QPen, QPaintEvent
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel
+from sampler import shared_sampler
+
+# 窗口基础高度和每条告警增加的高度
+BASE_HEIGHT = 180
+ALERT_LINE_HEIGHT = 18
 
 class ProgressBar(QWidget):
     """像素风格进度条"""
@@ -19,6 +23,7 @@ class ProgressBar(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.value = 0
+        self.alert = False  # 相关指标是否正在告警
         self.setFixedHeight(20)
         self.setMinimumWidth(200)
     
@@ -27,6 +32,12 @@ class ProgressBar(QWidget):
         self.value = max(0, min(100, value))
         self.update()
     
+    def set_alert(self, alert):
+        """设置告警状态，告警时边框显示为红色"""
+        if alert != self.alert:
+            self.alert = alert
+            self.update()
+    
     def paintEvent(self, event):
         """绘制进度条"""
         painter = QPainter(self)
@@ -35,7 +46,7 @@ class ProgressBar(QWidget):
         painter.fillRect(self.rect(), QColor(34, 34, 34))
         
         # 绘制边框
-        pen = QPen(QColor(102, 102, 102))
+        pen = QPen(QColor(220, 20, 60) if self.alert else QColor(102, 102, 102))
         pen.setWidth(2)
         painter.setPen(pen)
         painter.drawRect(0, 0, self.width() - 1, self.height() - 1)
@@ -68,28 +79,47 @@ class ProgressBar(QWidget):
 class SystemMonitor(QWidget):
     """系统监控窗口类"""
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, alert_engine=None):
         super().__init__(parent)
         
         # 窗口设置
         self.setWindowTitle("系统监控")
-        self.setFixedSize(250, 180)
+        self.setFixedSize(250, BASE_HEIGHT)
         self.setWindowFlags(Qt.Window | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+        # 每次悬停都会创建新窗口，关闭后释放，不再接收采样和告警
+        self.setAttribute(Qt.WA_DeleteOnClose)
         
-        # 网络数据缓存
-        self.last_net_io = psutil.net_io_counters()
-        self.last_net_time = time.time()
+        # 共享的每秒采样，窗口显示期间才需要
+        self.sampler = shared_sampler()
+        self.sampler.sampled.connect(self.update_stats)
+        self.sampling = False
         
         # 初始化UI
         self.init_ui()
         
-        # 启动更新计时器
-        self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self.update_stats)
-        self.update_timer.start(1000)  # 每秒更新一次
+        # 告警规则
+        self.alert_engine = alert_engine
+        if alert_engine:
+            alert_engine.alerts_changed.connect(self.update_alerts)
+            self.update_alerts(alert_engine.firing())
         
-        # 首次更新数据
-        self.update_stats()
+        # 先显示最近一次的数据
+        if self.sampler.last:
+            self.update_stats(self.sampler.last)
+    
+    def showEvent(self, event):
+        """显示时开始使用采样"""
+        if not self.sampling:
+            self.sampling = True
+            self.sampler.acquire()
+        super().showEvent(event)
+    
+    def hideEvent(self, event):
+        """隐藏或关闭时停止使用采样"""
+        if self.sampling:
+            self.sampling = False
+            self.sampler.release()
+        super().hideEvent(event)
     
     def init_ui(self):
         """初始化UI"""
@@ -168,6 +198,13 @@ class SystemMonitor(QWidget):
         
         layout.addLayout(net_layout)
         
+        # 正在触发的告警
+        self.alert_label = QLabel(self)
+        self.alert_label.setFont(QFont("Courier New", 9))
+        self.alert_label.setStyleSheet("color: #DC143C; border: none;")
+        self.alert_label.hide()
+        layout.addWidget(self.alert_label)
+        
         # 设置窗口样式
         self.setStyleSheet("""
             QWidget {
@@ -177,38 +214,32 @@ class SystemMonitor(QWidget):
             }
         """)
     
-    def update_stats(self):
-        """更新系统统计信息"""
+    def update_stats(self, sample):
+        """用采样数据更新显示"""
         # 更新CPU使用率
-        cpu_percent = psutil.cpu_percent()
-        self.cpu_value.setText(f"{cpu_percent:.1f}%")
-        self.cpu_progress.set_value(cpu_percent)
+        self.cpu_value.setText(f"{sample['cpu']:.1f}%")
+        self.cpu_progress.set_value(sample["cpu"])
         
         # 更新内存使用率
-        mem = psutil.virtual_memory()
-        mem_percent = mem.percent
-        self.mem_value.setText(f"{mem_percent:.1f}%")
-        self.mem_progress.set_value(mem_percent)
-        
-        # 更新网络流量
-        current_net_io = psutil.net_io_counters()
-        current_time = time.time()
-        
-        # 计算时间差
-        time_diff = current_time - self.last_net_time
-        
-        if time_diff > 0:
-            # 计算下载和上传速度（字节/秒）
-            down_speed = (current_net_io.bytes_recv - self.last_net_io.bytes_recv) / time_diff
-            up_speed = (current_net_io.bytes_sent - self.last_net_io.bytes_sent) / time_diff
-            
-            # 更新显示
-            self.down_label.setText(f"↓ {self.format_speed(down_speed)}")
-            self.up_label.setText(f"↑ {self.format_speed(up_speed)}")
-            
-            # 更新缓存数据
-            self.last_net_io = current_net_io
-            self.last_net_time = current_time
+        self.mem_value.setText(f"{sample['mem']:.1f}%")
+        self.mem_progress.set_value(sample["mem"])
+        
+        # 更新网络流量（字节/秒）
+        self.down_label.setText(f"↓ {self.format_speed(sample['rx'])}")
+        self.up_label.setText(f"↑ {self.format_speed(sample['tx'])}")
+    
+    def update_alerts(self, rules):
+        """显示正在触发的告警，并标记相关的进度条"""
+        metrics = {rule.metric for rule in rules}
+        self.cpu_progress.set_alert("cpu" in metrics)
+        self.mem_progress.set_alert("mem" in metrics)
+        
+        if rules:
+            self.alert_label.setText("\n".join(f"⚠ {rule.name}" for rule in rules))
+            self.alert_label.show()
+        else:
+            self.alert_label.hide()
+        self.setFixedSize(250, BASE_HEIGHT + ALERT_LINE_HEIGHT * len(rules))
     
     def format_speed(self, bytes_per_sec):
         """格式化网速显示"""
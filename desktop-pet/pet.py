@@ -7,27 +7,82 @@
 """
 
 import os
+import math
 import random
 import time
-from PyQt5.QtCore import Qt, QTimer, QPoint, QRect, QSize
-from PyQt5.QtGui import QPixmap, QPainter, QCursor, QTransform
+from datetime import datetime
+from PyQt5.QtCore import Qt, QTimer, QPoint, QRect, QSize, pyqtSignal
+from PyQt5.QtGui import QPixmap, QPainter, QCursor, QTransform, QColor, QFont
 from PyQt5.QtWidgets import (QWidget, QMenu, QAction, QDesktopWidget, 
                             QLabel, QVBoxLayout, QApplication)
-from memo import MemoWindow
-from monitor import SystemMonitor
+import startup_trace
+from frame_stats import FrameStats
+from diagnostics import diagnostics
+from animation import shared_graph
+from power import ACTIVE, DROWSY, SUSPENDED, DROWSY_FPS
+import skins
+
+# 备忘录和系统监控（及其依赖的psutil）在首次使用或启动空闲时才加载
+
+# 在窗口上行走：吸附到表面的容差和下落加速度（像素）
+SURFACE_TOLERANCE = 6
+GRAVITY = 3
+
+# 动画速度设置为该值时按状态配置的帧率播放
+BASE_FPS = 15
+
+class SpeechBubble(QLabel):
+    """宠物头顶的提示气泡"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
+        self.setWordWrap(True)
+        self.setMaximumWidth(220)
+        self.setStyleSheet("""
+            QLabel {
+                background-color: #333333;
+                color: white;
+                border: 2px solid #666666;
+                font-family: 'Courier New';
+                font-size: 12px;
+                padding: 6px;
+            }
+        """)
+        
+        # 自动隐藏计时器
+        self.hide_timer = QTimer(self)
+        self.hide_timer.setSingleShot(True)
+        self.hide_timer.timeout.connect(self.hide)
+    
+    def show_text(self, text, anchor, duration=6000):
+        """在锚点控件上方显示文字"""
+        self.setText(text)
+        self.adjustSize()
+        pos = anchor.pos()
+        x = pos.x() + (anchor.width() - self.width()) // 2
+        y = pos.y() - self.height() - 5
+        self.move(max(0, x), max(0, y))
+        self.show()
+        self.hide_timer.start(duration)
 
 class DesktopPet(QWidget):
     """桌面宠物主类"""
     
-    def __init__(self):
+    # 第一次绘制完成
+    first_painted = pyqtSignal()
+    
+    def __init__(self, memo_store=None, surface_index=None, graph=None):
         super().__init__()
         
         # 属性初始化
-        self.state = "IDLE"  # 初始状态：待机
+        self.graph = graph or shared_graph()  # 动画状态图，所有宠物共享
+        self.anim_state = self.graph.initial  # 当前状态的配置
+        self.state = self.anim_state.name  # 初始状态
         self.direction = random.choice([1, -1])   # 初始方向随机
         self.frame_index = 0  # 当前帧索引
         self.scale_factor = 4  # 默认放大4倍
-        self.fps = 15         # 默认15帧/秒
+        self.fps = BASE_FPS   # 动画速度，实际帧率按状态配置等比例缩放
         self.speed = 4        # 移动速度，从2增加到4
         self.is_paused = False # 是否暂停
         self.is_dragging = False # 是否拖拽中
@@ -35,6 +90,20 @@ class DesktopPet(QWidget):
         self.position_y = 0    # 当前Y坐标，用于保持垂直位置
         self.position_x = 0    # 当前X坐标，用于保持水平位置
         self.first_move = True  # 标记是否第一次移动，用于初始化位置
+        self.target_x = None   # 提醒时要走到的X坐标
+        self.reminder_texts = []  # 等待显示的提醒内容
+        self.memo_store = memo_store  # 共享的备忘录存储
+        self.painted = False   # 是否已完成第一次绘制
+        self.surface_index = surface_index  # 其他窗口顶边的索引，None表示不可用
+        self.walk_on_windows = True  # 是否站在其他窗口上
+        self.fall_speed = 0    # 当前下落速度
+        self.state_started = time.monotonic()  # 进入当前状态的时间
+        self.state_dwell = 0   # 当前状态的停留时间（毫秒）
+        self.hop_offset = 0    # 跳跃时的垂直偏移
+        self.power = None      # 电源模式管理，None表示不可用
+        self.power_mode = ACTIVE  # 当前电源模式
+        self.skin = None       # 当前皮肤名称，None表示 frames 目录中的默认帧
+        self.alert_engine = None  # 系统告警引擎，None表示没有告警规则
         
         # 动画帧资源
         self.frames = {
@@ -44,6 +113,7 @@ class DesktopPet(QWidget):
         
         # 加载资源
         self.load_frames()
+        startup_trace.mark("加载帧")
         
         # 窗口设置
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
@@ -56,15 +126,19 @@ class DesktopPet(QWidget):
         y = screen_geo.height() - self.height() - 50
         self.move(x, y)
         
-        # 动画计时器 - 提高帧率
+        # 动画计时器，间隔由当前状态的帧率决定
         self.animation_timer = QTimer(self)
         self.animation_timer.timeout.connect(self.update_animation)
-        self.animation_timer.start(1000 // 20)  # 提高到20帧/秒
+        self.animation_timer.start(self.frame_interval())
+        
+        # 帧耗时统计
+        self.frame_stats = FrameStats(self.animation_timer.interval())
+        self.show_frame_stats = False  # 是否在角落叠加显示统计
         
-        # 状态切换计时器 - 增加切换频率
+        # 状态切换计时器，间隔为状态的停留时间
         self.state_timer = QTimer(self)
         self.state_timer.timeout.connect(self.random_state_change)
-        self.state_timer.start(random.randint(1500, 4000))  # 减少状态切换间隔
+        self.enter_state(self.anim_state)
         
         # 系统监控悬停计时器
         self.hover_timer = QTimer(self)
@@ -74,15 +148,15 @@ class DesktopPet(QWidget):
         # 初始化子窗口
         self.memo_window = None
         self.monitor_window = None
+        self.bubble = None
         
         # 连接应用退出信号
         QApplication.instance().aboutToQuit.connect(self.cleanup)
     
     def load_frames(self):
         """加载动画帧资源"""
-        # 清空现有帧
-        self.frames["IDLE"].clear()
-        self.frames["WALK"].clear()
+        # 重新创建帧列表（皮肤的帧列表由所有宠物共享，不能原地清空）
+        self.frames = {"IDLE": [], "WALK": []}
         
         # 检查帧是否全部成功加载的标志
         all_frames_loaded = True
@@ -126,6 +200,26 @@ class DesktopPet(QWidget):
         # 更新窗口尺寸
         self.update_size()
     
+    def set_skin(self, name):
+        """切换皮肤，name为None时恢复默认帧"""
+        if name is None:
+            self.load_frames()
+        else:
+            try:
+                self.frames = skins.load_skin(name)
+            except skins.SkinError as e:
+                self.show_message(str(e))
+                return
+            self.update_size()
+        
+        self.skin = name
+        self.frame_index = 0
+        self.update()
+    
+    def current_frames(self):
+        """当前状态使用的帧组，帧组不存在时使用待机帧"""
+        return self.frames.get(self.anim_state.frames) or self.frames["IDLE"]
+    
     def update_size(self):
         """更新窗口尺寸"""
         if not self.frames["IDLE"]:
@@ -141,23 +235,37 @@ class DesktopPet(QWidget):
     
     def update_animation(self):
         """更新动画帧和位置"""
+        start = time.perf_counter_ns()
+        self.frame_stats.tick_started(start)
+        
         if self.is_paused:
             return
             
         # 获取当前状态的帧列表
-        frames = self.frames[self.state]
+        frames = self.current_frames()
         if not frames:
             return
             
         # 更新帧索引
         self.frame_index = (self.frame_index + 1) % len(frames)
         
-        # 如果是行走状态，更新位置
-        if self.state == "WALK":
+        # 会移动的状态，更新位置
+        if self.anim_state.speed:
+            move_start = time.perf_counter_ns()
             self.move_pet()
+            self.frame_stats.move.add(time.perf_counter_ns() - move_start)
+        
+        # 站在窗口顶边或屏幕底部，脚下悬空时下落
+        if self.surface_index is not None and self.walk_on_windows and not self.is_dragging:
+            self.apply_gravity()
+        
+        # 跳跃状态在停留时间内起落一次
+        if (self.anim_state.hop or self.hop_offset) and not self.is_dragging:
+            self.update_hop()
         
         # 触发重绘
         self.update()
+        self.frame_stats.tick.add(time.perf_counter_ns() - start)
     
     def move(self, x, y):
         """重写move方法，在移动时保存当前位置"""
@@ -176,7 +284,17 @@ class DesktopPet(QWidget):
             self.first_move = False
             
         # 计算移动距离，确保为整数像素
-        distance = int(self.speed * self.direction * (self.scale_factor / 4))
+        distance = int(self.speed * self.anim_state.speed * self.direction * (self.scale_factor / 4))
+        
+        # 有目标位置时朝目标移动，到达后停下
+        if self.target_x is not None:
+            self.direction = 1 if self.target_x > self.position_x else -1
+            distance = abs(distance) * self.direction
+            if abs(self.target_x - self.position_x) <= abs(distance):
+                super().move(int(self.target_x), int(self.position_y))
+                self.position_x = self.target_x
+                self.arrive_at_target()
+                return
         
         # 计算新的X坐标
         new_x = self.position_x + distance
@@ -198,30 +316,90 @@ class DesktopPet(QWidget):
         super().move(int(new_x), int(self.position_y))
         self.position_x = new_x  # 更新保存的X坐标
     
+    def apply_gravity(self):
+        """让宠物落到脚下最近的窗口顶边或屏幕底部"""
+        if self.first_move:
+            pos = self.pos()
+            self.position_x = pos.x()
+            self.position_y = pos.y()
+            self.first_move = False
+        
+        screen_geo = QDesktopWidget().availableGeometry()
+        floor = screen_geo.y() + screen_geo.height()
+        feet_x = int(self.position_x) + self.width() // 2
+        feet_y = int(self.position_y) + self.height()
+        
+        ground = self.surface_index.surface_below(feet_x, feet_y, SURFACE_TOLERANCE)
+        if ground is None or ground > floor:
+            ground = floor
+        
+        if abs(ground - feet_y) <= SURFACE_TOLERANCE:
+            # 贴合表面
+            self.fall_speed = 0
+            new_y = ground - self.height()
+        else:
+            # 加速下落，不穿过表面
+            self.fall_speed += GRAVITY
+            new_y = min(feet_y + self.fall_speed, ground) - self.height()
+        
+        if new_y != self.position_y:
+            super().move(int(self.position_x), int(new_y))
+            self.position_y = new_y
+    
+    def update_hop(self):
+        """根据在跳跃状态中经过的时间计算垂直偏移"""
+        offset = 0
+        if self.anim_state.hop and self.state_dwell:
+            progress = min(1.0, (time.monotonic() - self.state_started) * 1000 / self.state_dwell)
+            offset = int(math.sin(math.pi * progress) * self.anim_state.hop * self.scale_factor)
+        
+        # 行走和下落都会按地面高度移动窗口，每帧都需要重新应用偏移
+        self.hop_offset = offset
+        super().move(int(self.position_x), int(self.position_y) - offset)
+    
     def random_state_change(self):
-        """随机改变状态"""
-        if not self.is_paused and not self.is_dragging:
-            # 有80%概率切换状态，提高变化概率
-            if random.random() < 0.8:
-                self.state = "WALK" if self.state == "IDLE" else "IDLE"
-                
-                # 如果切换到行走状态且当前静止，随机选择移动方向
-                if self.state == "WALK":
-                    # 20%的概率改变方向（如果宠物静止）
-                    if random.random() < 0.2:
-                        self.direction = random.choice([1, -1])
-            
-            # 重设随机切换计时器，间隔更短
-            self.state_timer.start(random.randint(1500, 4000))
+        """按状态图的转移权重切换到下一个状态"""
+        if not self.is_paused and not self.is_dragging and self.target_x is None:
+            self.enter_state(self.graph.next_state(self.anim_state))
+    
+    def enter_state(self, anim_state):
+        """进入状态：应用帧率、重设停留计时器"""
+        self.anim_state = anim_state
+        self.state = anim_state.name
+        self.frame_index = 0
+        self.state_started = time.monotonic()
+        self.apply_fps()
+        
+        # 进入状态时可能随机改变方向
+        if anim_state.turn and random.random() < anim_state.turn:
+            self.direction = random.choice([1, -1])
+        
+        self.state_dwell = self.graph.dwell_ms(anim_state)
+        self.state_timer.start(self.state_dwell)
+    
+    def frame_interval(self):
+        """当前状态、动画速度和电源模式下的计时器间隔（毫秒）"""
+        fps = self.anim_state.fps * self.fps / BASE_FPS
+        if self.power_mode == DROWSY:
+            fps = min(fps, DROWSY_FPS)
+        return max(1, int(1000 / fps))
+    
+    def apply_fps(self):
+        """按当前状态和动画速度设置计时器间隔"""
+        interval = self.frame_interval()
+        if interval != self.animation_timer.interval():
+            self.animation_timer.setInterval(interval)
+            self.frame_stats.set_interval(interval)
     
     def paintEvent(self, event):
         """绘制事件"""
+        start = time.perf_counter_ns()
         painter = QPainter(self)
         # 禁用平滑渲染，保持像素风格的清晰度
         painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
         
         # 获取当前帧
-        frames = self.frames[self.state]
+        frames = self.current_frames()
         if not frames or self.frame_index >= len(frames):
             return
             
@@ -240,9 +418,24 @@ class DesktopPet(QWidget):
         
         # 绘制图像，确保像素保持清晰
         painter.drawPixmap(dest_rect, pixmap, src_rect)
+        
+        # 角落叠加显示帧统计
+        if self.show_frame_stats:
+            painter.setFont(QFont("Courier New", 6))
+            painter.setPen(QColor(255, 255, 0))
+            painter.drawText(self.rect().adjusted(2, 2, -2, -2), Qt.AlignLeft | Qt.AlignTop,
+                             self.frame_stats.summary())
+        
+        self.frame_stats.paint.add(time.perf_counter_ns() - start)
+        
+        if not self.painted:
+            self.painted = True
+            self.first_painted.emit()
     
     def mousePressEvent(self, event):
         """鼠标按下事件"""
+        self.wake_up()
+        
         if event.button() == Qt.LeftButton:
             # 记录拖拽偏移量
             self.is_dragging = True
@@ -289,11 +482,13 @@ class DesktopPet(QWidget):
             self.position_y = new_pos.y()
             self.first_move = False  # 已经有确定位置了
         else:
+            self.wake_up()
             # 悬停时启动计时器显示系统监控
             self.hover_timer.start(2000)  # 2秒后显示
     
     def contextMenuEvent(self, event):
         """右键菜单事件"""
+        self.wake_up()
         menu = QMenu(self)
         
         # 备忘录菜单项
@@ -303,17 +498,34 @@ class DesktopPet(QWidget):
         
         menu.addSeparator()
         
-        # 状态切换菜单项
-        if self.state == "IDLE":
-            state_action = QAction("切换到行走状态", self)
-            state_action.triggered.connect(lambda: self.set_state("WALK"))
-        else:
-            state_action = QAction("切换到待机状态", self)
-            state_action.triggered.connect(lambda: self.set_state("IDLE"))
-        menu.addAction(state_action)
+        # 状态切换菜单，列出状态图中的所有状态
+        state_menu = menu.addMenu("切换状态")
+        for anim_state in self.graph.order:
+            state_action = QAction(anim_state.label, self)
+            state_action.setCheckable(True)
+            state_action.setChecked(anim_state is self.anim_state)
+            state_action.triggered.connect(lambda checked, name=anim_state.name: self.set_state(name))
+            state_menu.addAction(state_action)
+        
+        # 在其他窗口上行走（需要窗口信息提供者）
+        surface_action = QAction("在窗口上行走", self)
+        surface_action.setCheckable(True)
+        surface_action.setChecked(self.walk_on_windows and self.surface_index is not None)
+        surface_action.setEnabled(self.surface_index is not None)
+        surface_action.toggled.connect(self.toggle_walk_on_windows)
+        menu.addAction(surface_action)
         
         menu.addSeparator()
         
+        # 皮肤菜单
+        skin_menu = menu.addMenu("切换皮肤")
+        for name, label in [(None, "默认")] + skins.list_skins():
+            skin_action = QAction(label, self)
+            skin_action.setCheckable(True)
+            skin_action.setChecked(name == self.skin)
+            skin_action.triggered.connect(lambda checked, name=name: self.set_skin(name))
+            skin_menu.addAction(skin_action)
+        
         # 尺寸调整菜单
         size_menu = menu.addMenu("显示尺寸")
         
@@ -336,6 +548,57 @@ class DesktopPet(QWidget):
         decrease_fps.triggered.connect(self.decrease_fps)
         speed_menu.addAction(decrease_fps)
         
+        # 帧率统计菜单
+        stats_menu = menu.addMenu("帧率统计")
+        
+        overlay_action = QAction("显示统计", self)
+        overlay_action.setCheckable(True)
+        overlay_action.setChecked(self.show_frame_stats)
+        overlay_action.toggled.connect(self.toggle_frame_stats)
+        stats_menu.addAction(overlay_action)
+        
+        dump_action = QAction("导出统计(JSON)", self)
+        dump_action.triggered.connect(self.dump_frame_stats)
+        stats_menu.addAction(dump_action)
+        
+        reset_action = QAction("重置统计", self)
+        reset_action.triggered.connect(self.frame_stats.reset)
+        stats_menu.addAction(reset_action)
+        
+        # 诊断菜单
+        diag_menu = menu.addMenu("诊断")
+        
+        if diagnostics.profiling:
+            profile_action = QAction("停止性能采集", self)
+            profile_action.triggered.connect(lambda: self.show_message(diagnostics.stop_profile()))
+        else:
+            profile_action = QAction("开始性能采集", self)
+            profile_action.triggered.connect(lambda: self.show_message(diagnostics.start_profile()))
+        diag_menu.addAction(profile_action)
+        
+        snapshot_action = QAction("内存快照", self)
+        snapshot_action.triggered.connect(lambda: self.show_message(diagnostics.take_snapshot()))
+        diag_menu.addAction(snapshot_action)
+        
+        if diagnostics.tracing_memory:
+            stop_trace_action = QAction("停止内存追踪", self)
+            stop_trace_action.triggered.connect(lambda: self.show_message(diagnostics.stop_memory_trace()))
+            diag_menu.addAction(stop_trace_action)
+        
+        counts_action = QAction("对象计数", self)
+        counts_action.triggered.connect(self.show_object_counts)
+        diag_menu.addAction(counts_action)
+        
+        if self.power:
+            power_action = QAction("电源模式统计", self)
+            power_action.triggered.connect(lambda: self.show_message(self.power.summary()))
+            diag_menu.addAction(power_action)
+        
+        if self.memo_store and self.memo_store.writer:
+            save_action = QAction("备忘录保存统计", self)
+            save_action.triggered.connect(lambda: self.show_message(self.memo_store.writer.summary()))
+            diag_menu.addAction(save_action)
+        
         menu.addSeparator()
         
         # 退出菜单项
@@ -348,9 +611,8 @@ class DesktopPet(QWidget):
     
     def set_state(self, state):
         """设置宠物状态"""
-        if state in ["IDLE", "WALK"]:
-            self.state = state
-            self.frame_index = 0
+        if state in self.graph.states:
+            self.enter_state(self.graph.states[state])
             self.update()
     
     def increase_size(self):
@@ -369,29 +631,147 @@ class DesktopPet(QWidget):
         """增加动画帧率"""
         if self.fps < 30:
             self.fps += 5  # 增加加速幅度
-            self.animation_timer.setInterval(1000 // self.fps)
+            self.apply_fps()
     
     def decrease_fps(self):
         """减小动画帧率"""
         if self.fps > 6:
             self.fps -= 5  # 增加减速幅度
-            self.animation_timer.setInterval(1000 // self.fps)
+            self.apply_fps()
+    
+    def toggle_walk_on_windows(self, checked):
+        """切换是否站在其他窗口上"""
+        self.walk_on_windows = checked
+        self.fall_speed = 0
+    
+    def toggle_frame_stats(self, checked):
+        """切换帧统计叠加显示"""
+        self.show_frame_stats = checked
+        self.update()
+    
+    def dump_frame_stats(self):
+        """导出帧统计到JSON文件"""
+        path = f"frame_stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            self.frame_stats.dump(path)
+        except IOError:
+            message = "无法导出帧率统计"
+        else:
+            message = f"帧率统计已导出：{path}"
+        self.show_message(message)
+    
+    def show_object_counts(self):
+        """显示存活对象数量"""
+        counts = diagnostics.object_counts()
+        self.show_message(f"QPixmap：{counts['pixmaps']}\n"
+                          f"备忘录窗口：{counts['memo_windows']}\n"
+                          f"计时器：{counts['timers']}")
+    
+    def show_message(self, text):
+        """在宠物头顶显示一条消息"""
+        if not self.bubble:
+            self.bubble = SpeechBubble()
+        self.bubble.show_text(text, self)
+    
+    def wake_up(self):
+        """收到输入时让所有宠物立即恢复运行"""
+        if self.power and self.power_mode != ACTIVE:
+            self.power.wake()
+    
+    def set_power_mode(self, mode):
+        """按电源模式调整动画和计时器"""
+        previous = self.power_mode
+        self.power_mode = mode
+        
+        if mode == ACTIVE:
+            # 从暂停中恢复，不把挂起期间计为掉帧
+            self.frame_stats.skip_gap()
+            self.set_state("IDLE" if self.target_x is None else "WALK")
+            if not self.animation_timer.isActive():
+                self.animation_timer.start(self.frame_interval())
+            return
+        
+        # 用户不在时关闭系统监控，停止采样
+        self.hover_timer.stop()
+        if self.monitor_window:
+            self.monitor_window.close()
+            self.monitor_window = None
+        
+        if mode == DROWSY:
+            # 低帧率播放睡觉动画，不再随机切换状态
+            if self.target_x is None:
+                self.enter_state(self.graph.states.get("SLEEP", self.graph.states["IDLE"]))
+            self.state_timer.stop()
+            self.apply_fps()
+            if previous == SUSPENDED:
+                self.frame_stats.skip_gap()
+                self.animation_timer.start()
+        elif mode == SUSPENDED:
+            # 停止所有计时器，窗口保持最后一帧
+            self.animation_timer.stop()
+            self.state_timer.stop()
+    
+    def on_reminders(self, memos):
+        """提醒到期：走到屏幕中央并显示气泡"""
+        self.reminder_texts.extend(memo["content"] for memo in memos)
+        
+        # 拖拽中直接显示
+        if self.is_dragging:
+            self.show_reminders()
+            return
+        
+        screen_geo = QDesktopWidget().availableGeometry()
+        self.target_x = screen_geo.x() + (screen_geo.width() - self.width()) // 2
+        self.is_paused = False
+        self.set_state("WALK")
+    
+    def on_alert(self, rule):
+        """系统告警：跳一下并显示告警内容"""
+        # 打盹或挂起时只显示气泡，切换状态会重新启动已停止的状态计时器
+        if (self.power_mode == ACTIVE and not self.is_dragging
+                and self.target_x is None and "JUMP" in self.graph.states):
+            self.set_state("JUMP")
+        self.show_message("⚠ " + rule.message)
+    
+    def arrive_at_target(self):
+        """到达目标位置"""
+        self.target_x = None
+        self.set_state("IDLE")
+        self.show_reminders()
+    
+    def show_reminders(self):
+        """显示等待中的提醒内容"""
+        if not self.reminder_texts:
+            return
+        
+        text = self.reminder_texts[0]
+        if len(text) > 60:
+            text = text[:60] + "…"
+        if len(self.reminder_texts) > 1:
+            text += f"\n（还有 {len(self.reminder_texts) - 1} 条提醒）"
+        self.reminder_texts = []
+        
+        if not self.bubble:
+            self.bubble = SpeechBubble()
+        self.bubble.show_text("⏰ " + text, self)
     
     def open_memo(self):
         """打开备忘录"""
         if not self.memo_window:
-            self.memo_window = MemoWindow(self)
+            from memo import MemoWindow
+            self.memo_window = MemoWindow(self, self.memo_store)
         
         self.memo_window.show()
         self.memo_window.raise_()
         self.memo_window.activateWindow()
     
-    def show_system_monitor(self):
+    def show_system_monitor(self, force=False):
         """显示系统监控窗口"""
-        # 如果鼠标仍在宠物窗口内，则显示系统监控
-        if self.rect().contains(self.mapFromGlobal(QCursor.pos())):
+        # 如果鼠标仍在宠物窗口内（或被命令强制要求），则显示系统监控
+        if force or self.rect().contains(self.mapFromGlobal(QCursor.pos())):
             if not self.monitor_window:
-                self.monitor_window = SystemMonitor(self)
+                from monitor import SystemMonitor
+                self.monitor_window = SystemMonitor(self, self.alert_engine)
                 
             # 计算窗口位置，显示在宠物旁边
             pet_pos = self.pos()
@@ -423,4 +803,7 @@ class DesktopPet(QWidget):
             self.memo_window.close()
         
         if self.monitor_window:
-            self.monitor_window.close() 
\ No newline at end of file
+            self.monitor_window.close()
+        
+        if self.bubble:
+            self.bubble.close() 
\ No newline at end of file
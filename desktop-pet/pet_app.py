@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+宠物应用模块
+管理共享的备忘录数据、提醒调度、命令服务和所有宠物实例
+"""
+
+import random
+import importlib
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QDesktopWidget
+from pet import DesktopPet
+from memo_store import MemoStore
+from memo_persist import MemoPersistWorker
+from memo_sync import MemoSync
+from reminder import ReminderScheduler
+from instance import CommandServer
+from surfaces import SurfaceIndex, create_provider
+from power import PowerManager, SUSPENDED, create_idle_source, load_config
+from alerts import AlertEngine, load_rules
+import startup_trace
+
+# 启动空闲时预先加载的模块（备忘录窗口、系统监控及psutil）
+PREWARM_MODULES = ("memo", "monitor")
+
+# 窗口位置刷新间隔（毫秒）
+SURFACE_REFRESH_INTERVAL = 200
+
+class PetApp:
+    """宠物应用"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.pets = []
+        self.memo_store = None
+        self.memo_writer = None
+        self.memo_sync = None
+        self.scheduler = None
+        self.surface_provider = None
+        self.surface_index = None
+        self.surface_timer = None
+        self.surface_stacking = None  # 上次应用到索引的堆叠顺序
+        self.power = None
+        self.sampler = None
+        self.alert_engine = None
+        self.services_started = False
+        
+        # 接收后续启动转发过来的命令
+        self.server = CommandServer(self.handle_command)
+    
+    def start(self):
+        """创建第一只宠物，其余服务在首次绘制后启动；已有实例在运行时返回False"""
+        if not self.server.listen():
+            return False
+        self.app.aboutToQuit.connect(self.server.close)
+        
+        # 备忘录存储先创建，数据在首次绘制后再加载
+        self.memo_store = MemoStore("memos.json")
+        
+        pet = self.spawn_pet()
+        pet.first_painted.connect(self.on_first_paint)
+        return True
+    
+    def on_first_paint(self):
+        """第一帧已显示，空闲时再启动其余服务"""
+        startup_trace.mark("首次绘制")
+        QTimer.singleShot(0, self.start_services)
+    
+    def start_services(self):
+        """加载备忘录并启动持久化、同步和提醒调度"""
+        if self.services_started:
+            return
+        self.services_started = True
+        
+        self.memo_store.load()
+        
+        # 备忘录在后台线程中合并写入，退出时限时等待写完
+        self.memo_writer = MemoPersistWorker(self.memo_store.memo_file, self.memo_store.memos)
+        self.memo_store.attach_writer(self.memo_writer)
+        
+        # 监视其他实例对备忘录文件的修改
+        self.memo_sync = MemoSync(self.memo_store, self.memo_writer)
+        
+        # 提醒调度
+        self.scheduler = ReminderScheduler(self.memo_store)
+        self.scheduler.reminders_due.connect(self.on_reminders)
+        self.app.aboutToQuit.connect(self.scheduler.stop)
+        
+        # 在宠物清理之后再结束写入线程
+        self.app.aboutToQuit.connect(self.memo_writer.stop)
+        
+        # 启动提醒调度，关闭期间错过的提醒会立即补发
+        self.scheduler.start()
+        
+        self.start_surfaces()
+        self.start_power()
+        self.start_alerts()
+        startup_trace.mark("启动服务")
+        
+        QTimer.singleShot(0, self.prewarm)
+    
+    def start_surfaces(self):
+        """连接窗口信息提供者，让宠物可以站在其他窗口上"""
+        self.surface_provider = create_provider()
+        if self.surface_provider is None:
+            return
+        
+        self.surface_index = SurfaceIndex()
+        self.refresh_surfaces()
+        for pet in self.pets:
+            pet.surface_index = self.surface_index
+        
+        self.surface_timer = QTimer()
+        self.surface_timer.timeout.connect(self.refresh_surfaces)
+        self.surface_timer.start(SURFACE_REFRESH_INTERVAL)
+        self.app.aboutToQuit.connect(self.stop_surfaces)
+    
+    def start_power(self):
+        """用户离开或锁屏时降低宠物的帧率，随后停止计时器"""
+        source = create_idle_source()
+        if source is None:
+            return
+        
+        drowsy_after, suspend_after = load_config()
+        self.power = PowerManager(source, drowsy_after, suspend_after)
+        self.power.mode_changed.connect(self.on_power_mode)
+        for pet in self.pets:
+            pet.power = self.power
+        self.power.start()
+        self.app.aboutToQuit.connect(self.power.stop)
+    
+    def start_alerts(self):
+        """按告警规则持续检查系统采样"""
+        rules = load_rules()
+        if not rules:
+            return
+        
+        # 采样模块依赖psutil，有告警规则时才加载
+        from sampler import shared_sampler
+        self.sampler = shared_sampler()
+        self.alert_engine = AlertEngine(rules)
+        self.alert_engine.alert_fired.connect(self.on_alert)
+        self.sampler.sampled.connect(self.alert_engine.feed)
+        for pet in self.pets:
+            pet.alert_engine = self.alert_engine
+        
+        self.sampler.acquire()
+        self.app.aboutToQuit.connect(self.sampler.release)
+    
+    def on_alert(self, rule):
+        """告警交给第一只宠物处理"""
+        if self.pets:
+            self.pets[0].on_alert(rule)
+    
+    def on_power_mode(self, mode):
+        """把电源模式应用到所有宠物和窗口位置刷新"""
+        for pet in self.pets:
+            pet.set_power_mode(mode)
+        
+        # 挂起时也停止告警采样
+        if self.sampler:
+            self.sampler.set_paused(mode == SUSPENDED)
+        
+        if self.surface_timer:
+            if mode == SUSPENDED:
+                self.surface_timer.stop()
+            elif not self.surface_timer.isActive():
+                self.refresh_surfaces()
+                self.surface_timer.start()
+    
+    def refresh_surfaces(self):
+        """把窗口变化增量应用到索引"""
+        changes = self.surface_provider.refresh()
+        stacking = self.surface_provider.stacking()
+        if changes or stacking != self.surface_stacking:
+            self.surface_stacking = stacking
+            self.surface_index.update(changes, stacking)
+    
+    def stop_surfaces(self):
+        """停止刷新并断开提供者"""
+        self.surface_timer.stop()
+        self.surface_provider.close()
+    
+    def prewarm(self):
+        """预先加载首次双击或悬停才会用到的模块"""
+        for name in PREWARM_MODULES:
+            importlib.import_module(name)
+        startup_trace.mark("预加载")
+        startup_trace.report()
+    
+    def spawn_pet(self):
+        """创建一只宠物"""
+        pet = DesktopPet(self.memo_store, self.surface_index)
+        pet.power = self.power
+        pet.alert_engine = self.alert_engine
+        
+        # 后召唤的宠物随机放在屏幕底部
+        if self.pets:
+            screen_geo = QDesktopWidget().availableGeometry()
+            x = random.randint(0, max(0, screen_geo.width() - pet.width()))
+            pet.move(x, pet.y())
+        
+        self.pets.append(pet)
+        pet.show()
+        return pet
+    
+    def on_reminders(self, memos):
+        """提醒交给第一只宠物处理"""
+        if self.power:
+            self.power.wake()
+        if self.pets:
+            self.pets[0].on_reminders(memos)
+    
+    def handle_command(self, command, args):
+        """执行命令，返回 (是否成功, 消息)"""
+        # 命令可能在服务启动前到达
+        self.start_services()
+        
+        # 转发命令说明用户就在电脑前
+        if self.power:
+            self.power.wake()
+        
+        if command == "add-memo":
+            content = " ".join(args).strip()
+            if not content:
+                return False, "备忘录内容为空"
+            if self.memo_store.add(content) is None:
+                return False, "备忘录已存在"
+            return True, "已添加备忘录"
+        
+        if command == "show-pet":
+            for pet in self.pets:
+                pet.show()
+                pet.raise_()
+            self.pets[0].activateWindow()
+            self.pets[0].show_message("我在这里！")
+            return True, "宠物已在运行"
+        
+        if command == "spawn-pet":
+            self.spawn_pet()
+            return True, f"当前共有 {len(self.pets)} 只宠物"
+        
+        if command == "show-monitor":
+            self.pets[0].show_system_monitor(force=True)
+            return True, "已显示系统监控"
+        
+        if command == "quit":
+            # 先回复再退出
+            QTimer.singleShot(0, self.app.quit)
+            return True, "正在退出"
+        
+        return False, f"未知命令：{command}"
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+电源模式模块
+根据用户空闲时间和锁屏状态切换宠物的电源模式：
+    ACTIVE     正常运行
+    DROWSY     用户离开一段时间后播放睡觉动画，帧率很低，不再随机切换状态
+    SUSPENDED  用户离开更久或锁屏后停止所有计时器
+有输入时立即回到 ACTIVE，并记录在每种模式下度过的时间
+
+空闲阈值在 power_config.json 中配置（秒）：
+    {"drowsy_after": 120, "suspend_after": 600}
+
+空闲信息来源：
+    X11IdleSource      X11 屏幕保护扩展和 logind 锁屏状态（需要 python-xlib）
+    WindowsIdleSource  Windows GetLastInputInfo
+    FakeIdleSource     手动设置空闲和锁屏状态，用于测试
+"""
+
+import os
+import sys
+import json
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+
+try:
+    # 槽函数的参数类型要在定义类时就确定，QtDBus 不可用时锁屏检测整体不启用
+    from PyQt5.QtDBus import QDBusMessage
+except ImportError:
+    QDBusMessage = None
+
+ACTIVE = "ACTIVE"
+DROWSY = "DROWSY"
+SUSPENDED = "SUSPENDED"
+
+MODE_LABELS = {ACTIVE: "运行", DROWSY: "打盹", SUSPENDED: "挂起"}
+
+# 默认配置文件
+CONFIG_FILE = "power_config.json"
+
+# 默认空闲阈值（秒）
+DROWSY_AFTER = 120
+SUSPEND_AFTER = 600
+
+# 打盹时的最高帧率
+DROWSY_FPS = 2
+
+# 查询空闲状态的间隔（毫秒）：运行时只需发现用户离开，离开后要尽快发现用户回来
+ACTIVE_POLL_INTERVAL = 2000
+IDLE_POLL_INTERVAL = 250
+
+
+def load_config(path=CONFIG_FILE):
+    """读取空闲阈值，返回 (打盹秒数, 挂起秒数)；文件缺失或无效时使用默认值"""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            config = json.load(file)
+        drowsy_after = float(config.get("drowsy_after", DROWSY_AFTER))
+        suspend_after = float(config.get("suspend_after", SUSPEND_AFTER))
+        if not 0 < drowsy_after <= suspend_after:
+            raise ValueError("需要 0 < drowsy_after <= suspend_after")
+    except FileNotFoundError:
+        return DROWSY_AFTER, SUSPEND_AFTER
+    except (IOError, ValueError, TypeError, AttributeError) as e:
+        print(f"警告: 省电配置无效，使用默认值: {e}")
+        return DROWSY_AFTER, SUSPEND_AFTER
+    return drowsy_after, suspend_after
+
+
+class IdleSource:
+    """空闲信息来源基类"""
+
+    def idle_seconds(self):
+        """距离用户最后一次输入的秒数"""
+        raise NotImplementedError
+
+    def locked(self):
+        """屏幕是否已锁定"""
+        return False
+
+    def close(self):
+        """释放资源"""
+
+
+class FakeIdleSource(IdleSource):
+    """手动控制的空闲信息来源"""
+
+    def __init__(self):
+        self.last_input = time.monotonic()
+        self.is_locked = False
+
+    def simulate_input(self):
+        """模拟一次用户输入"""
+        self.last_input = time.monotonic()
+
+    def set_idle(self, seconds):
+        """假设用户已空闲指定秒数"""
+        self.last_input = time.monotonic() - seconds
+
+    def set_locked(self, locked):
+        """设置锁屏状态"""
+        self.is_locked = locked
+
+    def idle_seconds(self):
+        return time.monotonic() - self.last_input
+
+    def locked(self):
+        return self.is_locked
+
+
+def logind_session_path(bus):
+    """
+    通过 logind 的 Manager 接口查询当前会话的对象路径
+
+    对象路径中的会话ID经过转义（如会话 2 对应 .../session/_32），不能直接拼接，
+    查询失败时使用表示调用者所在会话的 session/auto
+    """
+    from PyQt5.QtCore import QMetaType
+    from PyQt5.QtDBus import QDBusArgument, QDBusInterface, QDBusMessage
+
+    manager = QDBusInterface("org.freedesktop.login1", "/org/freedesktop/login1",
+                             "org.freedesktop.login1.Manager", bus)
+    if manager.isValid():
+        session_id = os.environ.get("XDG_SESSION_ID")
+        if session_id:
+            reply = manager.call("GetSession", session_id)
+        else:
+            reply = manager.call("GetSessionByPID", QDBusArgument(os.getpid(), QMetaType.UInt))
+        if reply.type() == QDBusMessage.ReplyMessage and reply.arguments():
+            path = reply.arguments()[0]
+            return path.path() if hasattr(path, "path") else str(path)
+    return "/org/freedesktop/login1/session/auto"
+
+
+class LogindLockWatcher(QObject):
+    """
+    logind 会话的锁屏标志
+
+    创建时读取一次 LockedHint，之后只在会话的 PropertiesChanged 信号到达时更新，
+    查询锁屏状态不再需要系统总线往返
+    """
+
+    SERVICE = "org.freedesktop.login1"
+    INTERFACE = "org.freedesktop.login1.Session"
+
+    def __init__(self, bus, path, parent=None):
+        super().__init__(parent)
+        from PyQt5.QtDBus import QDBusInterface
+        self.session = QDBusInterface(self.SERVICE, path, self.INTERFACE, bus)
+        if not self.session.isValid():
+            raise RuntimeError(f"无法访问 logind 会话 {path}")
+        self.locked = bool(self.session.property("LockedHint"))
+
+        if not bus.connect(self.SERVICE, path, "org.freedesktop.DBus.Properties",
+                           "PropertiesChanged", self.on_properties_changed):
+            raise RuntimeError("无法订阅 logind 会话的属性变化")
+
+    @pyqtSlot(QDBusMessage or object)
+    def on_properties_changed(self, message):
+        """会话属性变化：(接口名, {属性: 新值}, [失效的属性])"""
+        arguments = message.arguments()
+        if len(arguments) < 3 or arguments[0] != self.INTERFACE:
+            return
+        changed, invalidated = arguments[1], arguments[2]
+        if "LockedHint" in changed:
+            self.locked = bool(changed["LockedHint"])
+        elif "LockedHint" in invalidated:
+            # 只通知失效时才重新读取一次
+            self.locked = bool(self.session.property("LockedHint"))
+
+
+class X11IdleSource(IdleSource):
+    """通过 X11 屏幕保护扩展获取空闲时间，通过 logind 获取锁屏状态"""
+
+    def __init__(self):
+        from Xlib import display
+        from Xlib.ext import screensaver
+        self.StateOn = screensaver.StateOn
+
+        self.display = display.Display()
+        if not self.display.has_extension("MIT-SCREEN-SAVER"):
+            self.display.close()
+            raise RuntimeError("X 服务器不支持 MIT-SCREEN-SAVER 扩展")
+        self.root = self.display.screen().root
+        self.screensaver_on = False
+
+        # logind 会话的锁屏标志，无法连接系统总线时只依据屏幕保护状态
+        self.lock_watcher = None
+        try:
+            from PyQt5.QtDBus import QDBusConnection
+            bus = QDBusConnection.systemBus()
+            if bus.isConnected():
+                self.lock_watcher = LogindLockWatcher(bus, logind_session_path(bus))
+        except (ImportError, RuntimeError):
+            pass
+
+    def idle_seconds(self):
+        info = self.root.screensaver_query_info()
+        self.screensaver_on = info.state == self.StateOn
+        return info.idle / 1000
+
+    def locked(self):
+        if self.screensaver_on:
+            return True
+        # 缓存的值由信号更新，每次轮询不再访问系统总线
+        return self.lock_watcher is not None and self.lock_watcher.locked
+
+    def close(self):
+        self.display.close()
+
+
+class WindowsIdleSource(IdleSource):
+    """通过 GetLastInputInfo 获取空闲时间"""
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+
+        self.user32 = ctypes.windll.user32
+        self.kernel32 = ctypes.windll.kernel32
+        self.info = LASTINPUTINFO()
+        self.info.cbSize = ctypes.sizeof(LASTINPUTINFO)
+        self.byref = ctypes.byref
+
+    def idle_seconds(self):
+        if not self.user32.GetLastInputInfo(self.byref(self.info)):
+            return 0
+        # 两个计数都是32位毫秒数，按无符号差值处理回绕
+        return ((self.kernel32.GetTickCount() - self.info.dwTime) & 0xFFFFFFFF) / 1000
+
+
+def create_idle_source():
+    """创建当前环境可用的空闲信息来源，没有可用的来源时返回None"""
+    try:
+        if sys.platform == "win32":
+            return WindowsIdleSource()
+        if os.environ.get("DISPLAY"):
+            return X11IdleSource()
+    except Exception:
+        # 没有安装 python-xlib、无法连接 X 服务器或缺少扩展
+        return None
+    return None
+
+
+class PowerManager(QObject):
+    """电源模式管理"""
+
+    # 新的电源模式
+    mode_changed = pyqtSignal(str)
+
+    def __init__(self, source, drowsy_after=DROWSY_AFTER, suspend_after=SUSPEND_AFTER, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.drowsy_after = drowsy_after
+        self.suspend_after = suspend_after
+
+        self.mode = ACTIVE
+        self.mode_started = time.monotonic()
+        # 每种模式累计的秒数和进入次数
+        self.durations = {ACTIVE: 0.0, DROWSY: 0.0, SUSPENDED: 0.0}
+        self.entries = {ACTIVE: 1, DROWSY: 0, SUSPENDED: 0}
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def start(self):
+        """开始查询空闲状态"""
+        self.poll_timer.start(ACTIVE_POLL_INTERVAL)
+
+    def stop(self):
+        """停止查询并释放来源"""
+        self.poll_timer.stop()
+        self.source.close()
+
+    def poll(self):
+        """根据空闲时间和锁屏状态决定电源模式"""
+        idle = self.source.idle_seconds()
+        if self.source.locked() or idle >= self.suspend_after:
+            self.set_mode(SUSPENDED)
+        elif idle >= self.drowsy_after:
+            # 已挂起时只有用户输入才能唤醒，不退回打盹
+            if self.mode == ACTIVE:
+                self.set_mode(DROWSY)
+        else:
+            self.set_mode(ACTIVE)
+
+    def wake(self):
+        """本程序窗口收到输入时立即恢复运行"""
+        self.set_mode(ACTIVE)
+
+    def set_mode(self, mode):
+        """切换电源模式并记录时间"""
+        if mode == self.mode:
+            return
+
+        now = time.monotonic()
+        self.durations[self.mode] += now - self.mode_started
+        self.mode = mode
+        self.mode_started = now
+        self.entries[mode] += 1
+
+        self.poll_timer.setInterval(ACTIVE_POLL_INTERVAL if mode == ACTIVE else IDLE_POLL_INTERVAL)
+        self.mode_changed.emit(mode)
+
+    def time_in_modes(self):
+        """每种模式累计的秒数（包括当前模式到现在的时间）"""
+        durations = dict(self.durations)
+        durations[self.mode] += time.monotonic() - self.mode_started
+        return durations
+
+    def summary(self):
+        """简短的统计文字"""
+        durations = self.time_in_modes()
+        lines = [f"当前：{MODE_LABELS[self.mode]}"]
+        for mode in (ACTIVE, DROWSY, SUSPENDED):
+            lines.append(f"{MODE_LABELS[mode]}：{durations[mode] / 60:.1f} 分钟（{self.entries[mode]} 次）")
+        return "\n".join(lines)
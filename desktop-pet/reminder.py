@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+备忘录提醒调度模块
+所有待提醒的备忘录保存在最小堆中，只为最近的一条提醒设置一个计时器
+"""
+
+import time
+import heapq
+import itertools
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+# 单次计时的最长间隔（毫秒），避免超出QTimer范围并应对系统时间调整
+MAX_TIMER_INTERVAL = 60 * 60 * 1000
+
+
+class ReminderScheduler(QObject):
+    """提醒调度器"""
+
+    # 到期的备忘录列表
+    reminders_due = pyqtSignal(object)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+
+        # 最小堆：(提醒时间, 序号, 备忘录ID)
+        self.heap = []
+        # 仍然有效的提醒：备忘录ID -> 备忘录
+        self.pending = {}
+        # 最近一次登记的提醒时间：备忘录ID -> 提醒时间
+        self.scheduled = {}
+        # 相同提醒时间的先后顺序
+        self.counter = itertools.count()
+        # 当前计时器对应的提醒时间
+        self.armed_due = None
+
+        # 唯一的提醒计时器
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.fire_due)
+
+        # 备忘录变化时更新堆
+        self.store.memos_added.connect(self.on_memos_added)
+        self.store.memos_removed.connect(self.on_memos_removed)
+        self.store.memos_updated.connect(self.on_memos_updated)
+
+    def start(self):
+        """根据存储中的备忘录建立提醒堆，错过的提醒会立即补发"""
+        self.pending = {}
+        self.scheduled = {}
+        self.heap = []
+        for memo in self.store.memos:
+            if self.is_pending(memo):
+                self.pending[memo["id"]] = memo
+                self.scheduled[memo["id"]] = memo["due"]
+                self.heap.append((memo["due"], next(self.counter), memo["id"]))
+        heapq.heapify(self.heap)
+
+        self.armed_due = None
+        self.arm()
+
+    def stop(self):
+        """停止调度"""
+        self.timer.stop()
+        self.armed_due = None
+
+    def is_pending(self, memo):
+        """判断备忘录是否有未触发的提醒"""
+        return "due" in memo and not memo.get("reminded", False)
+
+    def push(self, memo):
+        """加入一条提醒"""
+        self.pending[memo["id"]] = memo
+        self.scheduled[memo["id"]] = memo["due"]
+        heapq.heappush(self.heap, (memo["due"], next(self.counter), memo["id"]))
+
+        # 只有新提醒早于当前计时器时才需要重新设置
+        if self.armed_due is None or memo["due"] < self.armed_due:
+            self.arm()
+
+    def is_valid(self, entry):
+        """判断堆中的条目是否仍然有效（删除和修改采用惰性删除）"""
+        due, _, memo_id = entry
+        memo = self.pending.get(memo_id)
+        return memo is not None and self.scheduled.get(memo_id) == due
+
+    def arm(self):
+        """为堆顶的提醒设置计时器"""
+        # 弹出已失效的堆顶
+        while self.heap and not self.is_valid(self.heap[0]):
+            heapq.heappop(self.heap)
+
+        # 失效条目过多时压缩堆
+        if len(self.heap) > 2 * len(self.pending) + 64:
+            self.heap = [entry for entry in self.heap if self.is_valid(entry)]
+            heapq.heapify(self.heap)
+
+        if not self.heap:
+            self.timer.stop()
+            self.armed_due = None
+            return
+
+        due = self.heap[0][0]
+        delay = int((due - time.time()) * 1000)
+        self.armed_due = due
+        self.timer.start(max(0, min(delay, MAX_TIMER_INTERVAL)))
+
+    def fire_due(self):
+        """触发所有已到期的提醒"""
+        now = time.time()
+        fired = []
+        while self.heap and self.heap[0][0] <= now:
+            entry = heapq.heappop(self.heap)
+            if self.is_valid(entry):
+                self.scheduled.pop(entry[2], None)
+                fired.append(self.pending.pop(entry[2]))
+
+        self.armed_due = None
+        if fired:
+            self.store.mark_reminded(fired)
+            self.reminders_due.emit(fired)
+
+        self.arm()
+
+    def on_memos_added(self, memos):
+        """新增备忘录"""
+        for memo in memos:
+            if self.is_pending(memo):
+                self.push(memo)
+
+    def on_memos_removed(self, memos):
+        """删除备忘录，堆中的条目在弹出时丢弃"""
+        for memo in memos:
+            self.pending.pop(memo["id"], None)
+            self.scheduled.pop(memo["id"], None)
+
+    def on_memos_updated(self, memos):
+        """修改备忘录，提醒时间变化时登记新的条目"""
+        for memo in memos:
+            if self.is_pending(memo):
+                if self.scheduled.get(memo["id"]) != memo["due"]:
+                    self.push(memo)
+            else:
+                self.pending.pop(memo["id"], None)
+                self.scheduled.pop(memo["id"], None)
+        self.arm()
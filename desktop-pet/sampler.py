@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+系统采样模块
+所有使用者共享一个每秒一次的 psutil 采样，只要还有使用者就继续采样
+"""
+
+import time
+import psutil
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+# 采样间隔（毫秒）
+SAMPLE_INTERVAL = 1000
+
+
+class SystemSampler(QObject):
+    """系统资源采样器"""
+
+    # 样本：{"time", "cpu", "mem", "rx", "tx"}，网络为字节/秒
+    sampled = pyqtSignal(object)
+
+    def __init__(self, interval=SAMPLE_INTERVAL, parent=None):
+        super().__init__(parent)
+        self.users = 0        # 正在使用采样的对象数
+        self.paused = False   # 省电模式下暂停
+        self.last = None      # 最近一次的样本
+
+        # 网络数据缓存
+        self.last_net_io = psutil.net_io_counters()
+        self.last_net_time = time.monotonic()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.sample)
+
+    def acquire(self):
+        """开始使用采样"""
+        self.users += 1
+        self.update_timer()
+
+    def release(self):
+        """停止使用采样"""
+        self.users = max(0, self.users - 1)
+        self.update_timer()
+
+    def set_paused(self, paused):
+        """暂停或恢复采样"""
+        self.paused = paused
+        self.update_timer()
+
+    def update_timer(self):
+        """按使用者和暂停状态启停计时器"""
+        if self.users and not self.paused:
+            if not self.timer.isActive():
+                self.timer.start()
+                self.sample()
+        else:
+            self.timer.stop()
+
+    def sample(self):
+        """采样一次并通知所有使用者"""
+        now = time.monotonic()
+        current_net_io = psutil.net_io_counters()
+        time_diff = now - self.last_net_time
+
+        rx = tx = 0.0
+        if time_diff > 0:
+            rx = (current_net_io.bytes_recv - self.last_net_io.bytes_recv) / time_diff
+            tx = (current_net_io.bytes_sent - self.last_net_io.bytes_sent) / time_diff
+        self.last_net_io = current_net_io
+        self.last_net_time = now
+
+        self.last = {
+            "time": now,
+            "cpu": psutil.cpu_percent(),
+            "mem": psutil.virtual_memory().percent,
+            "rx": rx,
+            "tx": tx,
+        }
+        self.sampled.emit(self.last)
+
+
+# 所有使用者共享的采样器
+_shared_sampler = None
+
+
+def shared_sampler():
+    """返回共享的采样器，首次调用时创建"""
+    global _shared_sampler
+    if _shared_sampler is None:
+        _shared_sampler = SystemSampler()
+    return _shared_sampler
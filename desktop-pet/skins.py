@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+皮肤模块
+从动画 GIF/APNG 或按网格切分的精灵图导入皮肤：提取帧、去除重复帧、
+按所有帧共同的非透明区域裁剪，并把解码后的 RGBA 数据写入以源文件内容哈希命名的缓存，
+之后的启动和切换直接读取缓存，不再解码（只有解码需要 Pillow）
+
+皮肤目录结构：
+    skins/<名称>/skin.json
+    {
+        "label": "显示名称",
+        "sets": {
+            "IDLE": {"file": "idle.gif"},
+            "WALK": {"file": "walk.png", "grid": [6, 1], "count": 6}
+        }
+    }
+帧组名称对应 animation_graph.json 中状态的 frames，必须包含 IDLE
+
+命令行用法：
+    python skins.py list
+    python skins.py import <名称> IDLE=<文件> WALK=<文件>[:列x行[:帧数]] [--label 显示名称]
+    python skins.py build <名称>
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+
+# 皮肤和解码缓存目录
+SKINS_DIR = "skins"
+CACHE_DIR = "skin_cache"
+MANIFEST = "skin.json"
+
+# 缓存格式版本，解码或裁剪规则变化时递增
+CACHE_VERSION = 1
+
+# 已加载的皮肤：皮肤目录 -> (源文件版本戳, {帧组: [QPixmap]})，所有宠物共享
+_loaded = {}
+
+
+class SkinError(Exception):
+    """皮肤无效或无法导入"""
+
+
+def list_skins(skins_dir=SKINS_DIR):
+    """返回 [(名称, 显示名称)]"""
+    skins = []
+    if not os.path.isdir(skins_dir):
+        return skins
+    for name in sorted(os.listdir(skins_dir)):
+        try:
+            manifest = read_manifest(name, skins_dir)
+        except SkinError:
+            continue
+        skins.append((name, str(manifest.get("label", name))))
+    return skins
+
+
+def read_manifest(name, skins_dir=SKINS_DIR):
+    """读取并检查皮肤描述文件"""
+    path = os.path.join(skins_dir, name, MANIFEST)
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (IOError, ValueError) as e:
+        raise SkinError(f"无法读取皮肤 {name}：{e}")
+
+    sets = manifest.get("sets") if isinstance(manifest, dict) else None
+    if not isinstance(sets, dict) or "IDLE" not in sets:
+        raise SkinError(f"皮肤 {name} 缺少 IDLE 帧组")
+    for set_name, spec in sets.items():
+        if not isinstance(spec, dict) or "file" not in spec:
+            raise SkinError(f"皮肤 {name} 的帧组 {set_name} 没有指定文件")
+    return manifest
+
+
+def cache_key(skin_dir, manifest):
+    """按描述内容和所有源文件内容计算缓存键"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{CACHE_VERSION}".encode("ascii"))
+    digest.update(json.dumps(manifest["sets"], sort_keys=True).encode("utf-8"))
+    for set_name in sorted(manifest["sets"]):
+        path = os.path.join(skin_dir, manifest["sets"][set_name]["file"])
+        try:
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(1 << 20), b""):
+                    digest.update(chunk)
+        except IOError as e:
+            raise SkinError(f"无法读取 {path}：{e}")
+    return digest.hexdigest()
+
+
+def source_stamp(skin_dir, manifest):
+    """描述内容和每个源文件的 (修改时间, 大小)，不读取文件内容"""
+    stamp = [json.dumps(manifest["sets"], sort_keys=True)]
+    for set_name in sorted(manifest["sets"]):
+        path = os.path.join(skin_dir, manifest["sets"][set_name]["file"])
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise SkinError(f"无法读取 {path}：{e}")
+        stamp.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def decode_source(path, grid=None, count=None):
+    """把动画图片或精灵图解码为 RGBA 帧列表（需要 Pillow）"""
+    try:
+        from PIL import Image, ImageSequence
+    except ImportError:
+        raise SkinError("导入皮肤需要安装 Pillow：pip install Pillow")
+
+    try:
+        with Image.open(path) as image:
+            if grid:
+                # 精灵图按列x行切分，从左到右、从上到下
+                columns, rows = int(grid[0]), int(grid[1])
+                width, height = image.width // columns, image.height // rows
+                sheet = image.convert("RGBA")
+                frames = [sheet.crop((column * width, row * height,
+                                      (column + 1) * width, (row + 1) * height))
+                          for row in range(rows) for column in range(columns)]
+            else:
+                # GIF/APNG 每一帧都已与之前的帧合成
+                frames = [frame.convert("RGBA") for frame in ImageSequence.Iterator(image)]
+    except (IOError, ValueError, ZeroDivisionError) as e:
+        raise SkinError(f"无法解码 {path}：{e}")
+
+    if count:
+        frames = frames[:int(count)]
+    if not frames:
+        raise SkinError(f"{path} 中没有帧")
+    return frames
+
+
+def decode_skin(skin_dir, manifest):
+    """
+    解码皮肤的所有帧组
+
+    返回 (宽, 高, 去重后的帧数据列表, {帧组: 帧序号列表})；
+    所有帧按共同的非透明区域裁剪，保证尺寸一致
+    """
+    decoded = {}
+    for set_name, spec in manifest["sets"].items():
+        path = os.path.join(skin_dir, spec["file"])
+        decoded[set_name] = decode_source(path, spec.get("grid"), spec.get("count"))
+
+    # 所有帧非透明区域的并集
+    size = decoded["IDLE"][0].size
+    box = None
+    for frames in decoded.values():
+        for frame in frames:
+            if frame.size != size:
+                raise SkinError("所有帧的尺寸必须相同")
+            bbox = frame.getchannel("A").getbbox()
+            if bbox is None:
+                continue
+            if box is None:
+                box = bbox
+            else:
+                box = (min(box[0], bbox[0]), min(box[1], bbox[1]),
+                       max(box[2], bbox[2]), max(box[3], bbox[3]))
+    if box is None:
+        box = (0, 0) + size
+
+    # 裁剪后按像素内容去重，帧组保存帧序号，保留原来的播放顺序
+    unique = {}
+    frames_data = []
+    sets = {}
+    for set_name, frames in decoded.items():
+        sequence = []
+        for frame in frames:
+            data = frame.crop(box).tobytes()
+            index = unique.get(data)
+            if index is None:
+                index = unique[data] = len(frames_data)
+                frames_data.append(data)
+            sequence.append(index)
+        sets[set_name] = sequence
+
+    return box[2] - box[0], box[3] - box[1], frames_data, sets
+
+
+def cache_path(key, cache_dir=CACHE_DIR):
+    """缓存文件路径"""
+    return os.path.join(cache_dir, f"{key}.rgba")
+
+
+def write_cache(path, width, height, frames_data, sets):
+    """写入缓存：一行JSON头，随后是所有帧的原始RGBA数据"""
+    header = {"version": CACHE_VERSION, "width": width, "height": height,
+              "frames": len(frames_data), "sets": sets}
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(json.dumps(header).encode("utf-8") + b"\n")
+            for data in frames_data:
+                file.write(data)
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_cache(path):
+    """读取缓存，文件不存在或无效时返回None"""
+    try:
+        with open(path, "rb") as file:
+            header = json.loads(file.readline().decode("utf-8"))
+            if header.get("version") != CACHE_VERSION:
+                return None
+            width, height = header["width"], header["height"]
+            frame_size = width * height * 4
+            data = file.read()
+    except (IOError, ValueError, KeyError, AttributeError):
+        return None
+
+    if len(data) != frame_size * header["frames"]:
+        return None
+    frames_data = [data[index * frame_size:(index + 1) * frame_size]
+                   for index in range(header["frames"])]
+    return width, height, frames_data, header["sets"]
+
+
+def build_skin(name, skins_dir=SKINS_DIR, cache_dir=CACHE_DIR):
+    """确保皮肤已解码到缓存，返回 (缓存键, 解码结果)"""
+    manifest = read_manifest(name, skins_dir)
+    return decode_cached(os.path.join(skins_dir, name), manifest, cache_dir)
+
+
+def decode_cached(skin_dir, manifest, cache_dir=CACHE_DIR):
+    """读取解码缓存，缓存不存在或已失效时重新解码并写入"""
+    key = cache_key(skin_dir, manifest)
+    path = cache_path(key, cache_dir)
+
+    decoded = read_cache(path)
+    if decoded is None:
+        decoded = decode_skin(skin_dir, manifest)
+        try:
+            write_cache(path, *decoded)
+        except OSError as e:
+            print(f"警告: 无法写入皮肤缓存: {e}")
+    return key, decoded
+
+
+def load_skin(name, skins_dir=SKINS_DIR, cache_dir=CACHE_DIR):
+    """
+    加载皮肤，返回 {帧组: [QPixmap]}；相同帧共用同一个 QPixmap
+
+    已加载过且描述和源文件的修改时间、大小都未变化时直接返回，
+    不再计算源文件哈希，也不读取缓存
+    """
+    manifest = read_manifest(name, skins_dir)
+    skin_dir = os.path.join(skins_dir, name)
+    stamp = source_stamp(skin_dir, manifest)
+    loaded = _loaded.get(skin_dir)
+    if loaded is not None and loaded[0] == stamp:
+        return loaded[1]
+
+    _, decoded = decode_cached(skin_dir, manifest, cache_dir)
+
+    from PyQt5.QtGui import QImage, QPixmap
+    width, height, frames_data, sets = decoded
+    pixmaps = [QPixmap.fromImage(QImage(data, width, height, width * 4, QImage.Format_RGBA8888))
+               for data in frames_data]
+    frames = {set_name: [pixmaps[index] for index in sequence]
+              for set_name, sequence in sets.items()}
+    _loaded[skin_dir] = (stamp, frames)
+    return frames
+
+
+def import_skin(name, sources, label=None, skins_dir=SKINS_DIR):
+    """
+    把源文件复制到新的皮肤目录并写入描述文件
+
+    sources: {帧组: (文件路径, 网格或None, 帧数或None)}
+    """
+    if "IDLE" not in sources:
+        raise SkinError("必须提供 IDLE 帧组")
+
+    skin_dir = os.path.join(skins_dir, name)
+    os.makedirs(skin_dir, exist_ok=True)
+
+    sets = {}
+    for set_name, (path, grid, count) in sources.items():
+        file_name = f"{set_name.lower()}{os.path.splitext(path)[1].lower()}"
+        shutil.copyfile(path, os.path.join(skin_dir, file_name))
+        spec = {"file": file_name}
+        if grid:
+            spec["grid"] = list(grid)
+        if count:
+            spec["count"] = count
+        sets[set_name] = spec
+
+    manifest = {"label": label or name, "sets": sets}
+    with open(os.path.join(skin_dir, MANIFEST), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def parse_source(arg):
+    """解析 帧组=文件[:列x行[:帧数]]"""
+    set_name, _, spec = arg.partition("=")
+    parts = spec.split(":")
+    # Windows 路径中的盘符也包含冒号
+    if len(parts) > 1 and len(parts[0]) == 1 and parts[1].startswith(("\\", "/")):
+        parts = [parts[0] + ":" + parts[1]] + parts[2:]
+
+    grid = count = None
+    if len(parts) > 1:
+        columns, _, rows = parts[1].lower().partition("x")
+        grid = (int(columns), int(rows or 1))
+    if len(parts) > 2:
+        count = int(parts[2])
+    return set_name.upper(), (parts[0], grid, count)
+
+
+def main(argv):
+    """命令行入口"""
+    if not argv or argv[0] not in ("list", "import", "build"):
+        print(__doc__)
+        return 1
+
+    try:
+        if argv[0] == "list":
+            for name, label in list_skins():
+                print(f"{name}\t{label}")
+            return 0
+
+        if len(argv) < 2:
+            print(__doc__)
+            return 1
+        name = argv[1]
+
+        if argv[0] == "import":
+            label = None
+            sources = {}
+            args = argv[2:]
+            while args:
+                arg = args.pop(0)
+                if arg == "--label" and args:
+                    label = args.pop(0)
+                elif "=" in arg:
+                    set_name, source = parse_source(arg)
+                    sources[set_name] = source
+            import_skin(name, sources, label)
+
+        _, (width, height, frames_data, sets) = build_skin(name)
+    except (SkinError, OSError, ValueError) as e:
+        print(f"错误: {e}")
+        return 1
+
+    total = sum(len(sequence) for sequence in sets.values())
+    print(f"皮肤 {name}：{width}x{height}，{total} 帧，去重后 {len(frames_data)} 帧")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动耗时追踪模块
+记录启动各阶段的时间点，使用 --startup-trace 启动时输出耗时明细
+"""
+
+import sys
+import time
+
+# 本模块被导入的时间，作为启动起点
+START = time.perf_counter()
+
+# 是否启用追踪
+enabled = False
+
+# 已记录的阶段：(名称, 时间点)
+phases = []
+
+
+def enable():
+    """启用追踪"""
+    global enabled
+    enabled = True
+
+
+def mark(name):
+    """记录一个阶段结束，未启用时不做任何事"""
+    if enabled:
+        phases.append((name, time.perf_counter()))
+
+
+def report(file=sys.stderr):
+    """输出各阶段耗时"""
+    if not enabled:
+        return
+
+    print("启动耗时：", file=file)
+    last = START
+    for name, moment in phases:
+        print(f"  {name:<12}{(moment - last) * 1000:8.1f} ms  （累计 {(moment - START) * 1000:.1f} ms）",
+              file=file)
+        last = moment
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+窗口表面模块
+从窗口几何信息提供者获取其他应用窗口的位置，维护窗口顶边的网格索引，
+让宠物可以站在其他窗口的顶边上行走
+
+提供者：
+    X11WindowProvider   通过 EWMH 读取 X11 窗口（需要 python-xlib）
+    FakeWindowProvider  内存中的假窗口，用于测试和无图形环境；
+                        设置环境变量 PET_FAKE_WINDOWS 时使用，格式为 "x,y,宽,高;x,y,宽,高"（从下到上）
+"""
+
+import os
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+
+# 窗口矩形（屏幕坐标，y 为包含标题栏的可见顶边）
+WindowRect = namedtuple("WindowRect", ["x", "y", "width", "height"])
+
+# 网格列宽（像素）
+CELL_WIDTH = 64
+
+# 使用假窗口的环境变量
+FAKE_WINDOWS_ENV = "PET_FAKE_WINDOWS"
+
+
+class WindowProvider:
+    """窗口几何信息提供者基类"""
+
+    def refresh(self):
+        """返回上次调用以来的变化：{窗口ID: WindowRect 或 None（已关闭/隐藏）}"""
+        raise NotImplementedError
+
+    def stacking(self):
+        """返回窗口ID的堆叠顺序（从下到上），不知道顺序时返回None"""
+        return None
+
+    def close(self):
+        """释放资源"""
+
+
+class FakeWindowProvider(WindowProvider):
+    """内存中的假窗口提供者"""
+
+    def __init__(self, windows=None):
+        super().__init__()
+        self.changes = {}
+        self.order = []  # 堆叠顺序，从下到上
+        for window_id, rect in (windows or {}).items():
+            self.set_window(window_id, *rect)
+
+    def set_window(self, window_id, x, y, width, height):
+        """新增或移动一个窗口，新窗口位于最上层"""
+        self.changes[window_id] = WindowRect(x, y, width, height)
+        if window_id not in self.order:
+            self.order.append(window_id)
+
+    def raise_window(self, window_id):
+        """把窗口移到最上层"""
+        if window_id in self.order:
+            self.order.remove(window_id)
+            self.order.append(window_id)
+
+    def remove_window(self, window_id):
+        """关闭一个窗口"""
+        self.changes[window_id] = None
+        if window_id in self.order:
+            self.order.remove(window_id)
+
+    def refresh(self):
+        """返回并清空累积的变化"""
+        changes, self.changes = self.changes, {}
+        return changes
+
+    def stacking(self):
+        return list(self.order)
+
+
+class X11WindowProvider(WindowProvider):
+    """
+    X11 窗口提供者
+
+    首次刷新读取 _NET_CLIENT_LIST_STACKING 中的全部窗口及其堆叠顺序；之后只处理 X 事件：
+    根窗口的客户端列表变化（包括窗口升降）、各窗口的 ConfigureNotify/MapNotify/UnmapNotify/DestroyNotify。
+    本进程的窗口（宠物、备忘录等）以及桌面和面板窗口不作为可站立的表面
+    """
+
+    def __init__(self):
+        super().__init__()
+        from Xlib import X, display, error
+        self.X = X
+        self.XError = error.XError
+
+        self.display = display.Display()
+        self.root = self.display.screen().root
+        self.client_list_atom = self.display.intern_atom("_NET_CLIENT_LIST_STACKING")
+        self.frame_extents_atom = self.display.intern_atom("_NET_FRAME_EXTENTS")
+        self.pid_atom = self.display.intern_atom("_NET_WM_PID")
+        self.type_atom = self.display.intern_atom("_NET_WM_WINDOW_TYPE")
+        self.skip_types = {self.display.intern_atom("_NET_WM_WINDOW_TYPE_DESKTOP"),
+                           self.display.intern_atom("_NET_WM_WINDOW_TYPE_DOCK")}
+        self.root.change_attributes(event_mask=X.PropertyChangeMask)
+
+        self.clients = set()
+        self.stack = []  # 客户端窗口的堆叠顺序，从下到上
+        self.client_list_dirty = True
+
+    def refresh(self):
+        """处理积压的 X 事件，返回变化的窗口"""
+        X = self.X
+        changed = set()
+        removed = set()
+
+        while self.display.pending_events():
+            event = self.display.next_event()
+            if event.type == X.PropertyNotify:
+                if event.atom == self.client_list_atom:
+                    self.client_list_dirty = True
+            elif event.type in (X.ConfigureNotify, X.MapNotify):
+                changed.add(event.window.id)
+            elif event.type in (X.UnmapNotify, X.DestroyNotify):
+                removed.add(event.window.id)
+
+        if self.client_list_dirty:
+            self.client_list_dirty = False
+            stack = self.read_client_list()
+            current = set(stack)
+            for window_id in current - self.clients:
+                # 订阅新窗口的结构变化事件
+                try:
+                    window = self.display.create_resource_object("window", window_id)
+                    if self.ignored(window):
+                        current.discard(window_id)
+                        continue
+                    window.change_attributes(event_mask=X.StructureNotifyMask)
+                except self.XError:
+                    current.discard(window_id)
+                    continue
+                changed.add(window_id)
+            removed |= self.clients - current
+            self.clients = current
+            self.stack = [window_id for window_id in stack if window_id in current]
+
+        changes = {}
+        for window_id in changed - removed:
+            if window_id in self.clients:
+                changes[window_id] = self.geometry(window_id)
+        for window_id in removed:
+            changes[window_id] = None
+        return changes
+
+    def stacking(self):
+        return self.stack
+
+    def read_client_list(self):
+        """读取窗口管理器维护的客户端窗口列表，按堆叠顺序从下到上"""
+        prop = self.root.get_full_property(self.client_list_atom, self.X.AnyPropertyType)
+        return list(prop.value) if prop else []
+
+    def ignored(self, window):
+        """是否为本进程的窗口或桌面、面板窗口"""
+        prop = window.get_full_property(self.pid_atom, self.X.AnyPropertyType)
+        if prop and prop.value and prop.value[0] == os.getpid():
+            return True
+        prop = window.get_full_property(self.type_atom, self.X.AnyPropertyType)
+        return bool(prop and self.skip_types.intersection(prop.value))
+
+    def geometry(self, window_id):
+        """读取窗口在屏幕上的可见矩形（包含标题栏），窗口不可见时返回None"""
+        try:
+            window = self.display.create_resource_object("window", window_id)
+            if window.get_attributes().map_state != self.X.IsViewable:
+                return None
+            geometry = window.get_geometry()
+            origin = window.translate_coords(self.root, 0, 0)
+
+            # 标题栏等装饰的高度
+            top = 0
+            extents = window.get_full_property(self.frame_extents_atom, self.X.AnyPropertyType)
+            if extents and len(extents.value) == 4:
+                top = extents.value[2]
+        except self.XError:
+            return None
+
+        return WindowRect(-origin.x, -origin.y - top, geometry.width, geometry.height + top)
+
+    def close(self):
+        """关闭与 X 服务器的连接"""
+        self.display.close()
+
+
+def parse_fake_windows(text):
+    """解析 "x,y,宽,高;x,y,宽,高" 格式的假窗口列表"""
+    windows = {}
+    for index, part in enumerate(filter(None, (item.strip() for item in text.split(";")))):
+        values = [int(value) for value in part.split(",")]
+        if len(values) != 4:
+            raise ValueError(f"假窗口格式错误：{part}")
+        windows[f"fake-{index}"] = values
+    return windows
+
+
+def create_provider():
+    """
+    创建当前环境可用的提供者，没有可用的提供者时返回None
+
+    设置了 PET_FAKE_WINDOWS 时使用假窗口（测试和无图形环境），否则在 X11 下读取真实窗口
+    """
+    fake_windows = os.environ.get(FAKE_WINDOWS_ENV)
+    if fake_windows is not None:
+        try:
+            return FakeWindowProvider(parse_fake_windows(fake_windows))
+        except ValueError as e:
+            print(f"警告: 忽略无效的 {FAKE_WINDOWS_ENV}: {e}")
+            return None
+
+    if os.environ.get("DISPLAY"):
+        try:
+            return X11WindowProvider()
+        except Exception:
+            # 没有安装 python-xlib 或无法连接 X 服务器
+            return None
+    return None
+
+
+class SurfaceIndex:
+    """
+    按列分桶的窗口顶边索引
+
+    每个窗口的顶边登记到它覆盖的每一列中，列内按顶边y排序；
+    查询只需在一列中二分定位，窗口变化时只更新它覆盖的列。
+    查询时跳过被更上层窗口挡住的顶边，遮挡它的窗口一定也在同一列中且顶边不低于它
+    """
+
+    def __init__(self, cell_width=CELL_WIDTH):
+        self.cell_width = cell_width
+        self.cells = {}  # 列号 -> 按顶边y排序的 [(顶边y, 左x, 右x, 窗口ID)]
+        self.edges = {}  # 窗口ID -> (左x, 右x, 顶边y, 底边y)
+        self.depth = {}  # 窗口ID -> 堆叠层次，越大越靠上
+
+    def __len__(self):
+        return len(self.edges)
+
+    def columns(self, left, right):
+        """返回线段覆盖的列号范围"""
+        return range(left // self.cell_width, (right - 1) // self.cell_width + 1)
+
+    def update(self, changes, stacking=None):
+        """应用提供者返回的变化和堆叠顺序（从下到上）"""
+        if stacking is not None:
+            self.depth = {window_id: depth for depth, window_id in enumerate(stacking)}
+        for window_id, rect in changes.items():
+            self.remove(window_id)
+            if rect is not None and rect.width > 0:
+                self.insert(window_id, rect)
+
+    def insert(self, window_id, rect):
+        """加入一个窗口的顶边"""
+        left, right, top = rect.x, rect.x + rect.width, rect.y
+        self.edges[window_id] = (left, right, top, top + rect.height)
+        entry = (top, left, right, window_id)
+        for column in self.columns(left, right):
+            insort(self.cells.setdefault(column, []), entry)
+
+    def remove(self, window_id):
+        """移除一个窗口的顶边"""
+        edge = self.edges.pop(window_id, None)
+        if edge is None:
+            return
+        left, right, top, _ = edge
+        entry = (top, left, right, window_id)
+        for column in self.columns(left, right):
+            bucket = self.cells[column]
+            del bucket[bisect_left(bucket, entry)]
+            if not bucket:
+                del self.cells[column]
+
+    def surface_below(self, x, y, tolerance=0):
+        """
+        查询 x 处、y 以下（含 tolerance 像素的容差）最近的可见窗口顶边
+
+        返回顶边的 y 坐标，没有时返回None
+        """
+        bucket = self.cells.get(x // self.cell_width)
+        if not bucket:
+            return None
+
+        # 从容差上限开始按y从上到下找第一条覆盖 x 且未被挡住的顶边
+        for index in range(bisect_left(bucket, (y - tolerance,)), len(bucket)):
+            top, left, right, window_id = bucket[index]
+            if left <= x < right and not self.occluded(bucket, x, top, window_id):
+                return top
+        return None
+
+    def occluded(self, bucket, x, top, window_id):
+        """x 处的这段顶边是否被更上层的窗口挡住"""
+        depth = self.depth.get(window_id, 0)
+        # 挡住它的窗口顶边不低于 top，在列内排在它之前（或与它等高）
+        for index in range(bisect_right(bucket, (top, float("inf")))):
+            other_top, left, right, other_id = bucket[index]
+            if (other_id != window_id and left <= x < right
+                    and self.depth.get(other_id, 0) > depth
+                    and top < self.edges[other_id][3]):
+                return True
+        return False